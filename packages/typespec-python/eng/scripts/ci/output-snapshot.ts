@@ -0,0 +1,73 @@
+/**
+ * Keeps the timestamps of generated files that come out byte-identical.
+ *
+ * Regeneration cleans the output folders before compiling, so every file is
+ * rewritten even when nothing changed, invalidating `.pyc` caches, wheel
+ * builds and other mtime-based tooling.  The regenerate pipeline snapshots the
+ * folders before cleaning them and restores the timestamps afterwards.
+ */
+import { createHash } from "crypto";
+import { readdir, readFile, stat, utimes } from "fs/promises";
+import { join } from "path";
+
+/** Folders inside an output directory that are never generated. */
+const SKIPPED_DIRS = new Set(["__pycache__", "node_modules", "build", "dist", "venv", ".venv"]);
+
+interface FileState {
+  size: number;
+  atime: Date;
+  mtime: Date;
+  hash: string;
+}
+
+/** Size, timestamps and content hash of every file in an output folder. */
+export type OutputSnapshot = Map<string, FileState>;
+
+async function hashFile(path: string): Promise<string> {
+  return createHash("sha256").update(await readFile(path)).digest("hex");
+}
+
+function isSkippedDir(name: string): boolean {
+  return name.startsWith(".") || name.endsWith(".egg-info") || SKIPPED_DIRS.has(name);
+}
+
+/** Record every file under `dir` into `snapshot` (a new one by default). */
+export async function snapshotOutput(
+  dir: string,
+  snapshot: OutputSnapshot = new Map(),
+): Promise<OutputSnapshot> {
+  async function walk(current: string) {
+    const items = await readdir(current, { withFileTypes: true }).catch(() => []);
+    for (const item of items) {
+      const path = join(current, item.name);
+      if (item.isDirectory()) {
+        if (!isSkippedDir(item.name)) await walk(path);
+      } else if (item.isFile()) {
+        const { size, atime, mtime } = await stat(path);
+        snapshot.set(path, { size, atime, mtime, hash: await hashFile(path) });
+      }
+    }
+  }
+
+  await walk(dir);
+  return snapshot;
+}
+
+/**
+ * Give every file that was rewritten with byte-identical content its previous
+ * timestamps back, so regeneration doesn't invalidate `.pyc` caches, wheel
+ * builds or other mtime-based tooling for files that did not change.
+ */
+export async function restoreUnchangedTimestamps(snapshot: OutputSnapshot): Promise<void> {
+  for (const [path, before] of snapshot) {
+    try {
+      const after = await stat(path);
+      if (after.size !== before.size || after.mtimeMs === before.mtime.getTime()) continue;
+      if ((await hashFile(path)) === before.hash) {
+        await utimes(path, before.atime, before.mtime);
+      }
+    } catch {
+      // The file was not generated again - nothing to restore.
+    }
+  }
+}
@@ -2,10 +2,11 @@
 /**
  * Shared helpers, types, constants, and data tables used by `regenerate.ts`.
  *
- * This file is meant to be **byte-identical** between this package and the
- * upstream `@typespec/http-client-python`. typespec-python syncs it from
- * <repo-root>/core/packages/http-client-python/eng/scripts/ci/regenerate-common.ts
- * via `pnpm sync`.
+ * This file started as a copy of the upstream `@typespec/http-client-python`
+ * one, <repo-root>/core/packages/http-client-python/eng/scripts/ci/regenerate-common.ts.
+ * It is not synced by `pnpm sync` while it carries the worker-thread,
+ * incremental and timing changes upstream doesn't have yet, so upstream
+ * changes (option tables in particular) have to be ported by hand.
  *
  * Per-repo divergence (paths, emitter name, single-phase vs two-phase
  * orchestration, argv/help text) lives in each repo's own `regenerate.ts`,
@@ -13,12 +14,20 @@
  * from this module.
  */
 
-import { compile, NodeHost } from "@typespec/compiler";
+import {
+  compile,
+  type CompilerHost,
+  NodeHost,
+  type Program,
+  type SourceFile,
+} from "@typespec/compiler";
 import { execSync } from "child_process";
-import { existsSync, rmSync } from "fs";
-import { access, mkdir, readdir, writeFile } from "fs/promises";
-import { dirname, join, relative, resolve } from "path";
+import { createHash, type Hash } from "crypto";
+import { existsSync, realpathSync, rmSync } from "fs";
+import { access, mkdir, readdir, readFile, writeFile } from "fs/promises";
+import { basename, dirname, join, relative, resolve } from "path";
 import pc from "picocolors";
+import { isMainThread, parentPort, Worker, workerData } from "worker_threads";
 
 // ---- Public types ----
 
@@ -67,6 +76,41 @@ export interface BuildTaskGroupsOptions {
   emitYamlOnly?: boolean;
 }
 
+export interface RunParallelOptions {
+  /**
+   * Number of worker threads to spread task groups across.  Each worker has
+   * its own event loop, so type checking runs on several cores at once.  `0`
+   * (the default) compiles every spec on the main thread.
+   */
+  workers?: number;
+  /**
+   * Per-task durations in seconds from previous runs, keyed by
+   * `manifestKey`.  Used to start the most expensive groups first and updated
+   * in place with the durations measured by this run.  Only compiles that had
+   * their thread to themselves are measured: every worker runs one compile at
+   * a time, and without workers only a run with a single job is recorded.
+   */
+  timings?: Record<string, number>;
+  /**
+   * Filled in with the spec source files (see `CompileResult.sourceFiles`) of
+   * every task that compiled, for `updateManifest`.
+   */
+  sourceFiles?: Map<CompileTask, string[]>;
+}
+
+export interface CompileResult {
+  success: boolean;
+  error?: string;
+  /**
+   * Absolute paths of the non-library TypeSpec sources the program loaded:
+   * the entry point and everything it imports from the spec packages, such
+   * as a shared `../common/service.tsp`.
+   */
+  sourceFiles?: string[];
+  /** Seconds spent in this compile alone, measured where it ran. */
+  duration?: number;
+}
+
 // ---- Public constants ----
 
 export const SKIP_SPECS: string[] = ["type/file"];
@@ -531,11 +575,87 @@ export function buildTaskGroups(
   return groups;
 }
 
+// ---- Shared library cache ----
+
+// Per thread: every worker (and the main thread) keeps its own host and the
+// last program it compiled.
+let cachingHost: CompilerHost | undefined;
+let previousProgram: Program | undefined;
+
+function memoize<T>(cache: Map<string, Promise<T>>, key: string, load: () => Promise<T>) {
+  let value = cache.get(key);
+  if (value === undefined) {
+    value = load();
+    cache.set(key, value);
+    // Don't remember failures (e.g. probing for a file that doesn't exist yet).
+    value.catch(() => cache.delete(key));
+  }
+  return value;
+}
+
+/**
+ * Whether a path lies in one of the spec packages (either through the
+ * node_modules symlink or its real location).  Everything else the compiler
+ * loads belongs to a library.
+ */
+function getSpecFileFilter(ctx: RegenerateContext): (path: string) => boolean {
+  const specRoots = [ctx.azureHttpSpecs, ctx.httpSpecs].flatMap((dir) => {
+    const roots = [toPosix(resolve(dir))];
+    try {
+      roots.push(toPosix(realpathSync(dir)));
+    } catch {
+      // Spec package not installed - nothing to match.
+    }
+    return roots;
+  });
+  return (path: string) => {
+    const posixPath = toPosix(path);
+    return specRoots.some((root) => posixPath.startsWith(root + "/"));
+  };
+}
+
+/**
+ * A `NodeHost` that memoizes reads of library sources: `.tsp` files and
+ * `package.json` manifests that live outside the spec folders.  Hundreds of
+ * specs import the same `@typespec/http`, `typespec-azure-core`, TCGC, ...
+ * sources, and those never change during a regeneration run.  Returning the
+ * same `SourceFile` objects also lets `compile()` reuse the parsed and bound
+ * scripts of `previousProgram` instead of parsing them again.
+ */
+function getCachingHost(ctx: RegenerateContext): CompilerHost {
+  if (cachingHost) return cachingHost;
+
+  const isSpecFile = getSpecFileFilter(ctx);
+  const isLibraryFile = (path: string) =>
+    (path.endsWith(".tsp") || path.endsWith("package.json")) && !isSpecFile(path);
+
+  const files = new Map<string, Promise<SourceFile>>();
+  const stats = new Map<string, ReturnType<CompilerHost["stat"]>>();
+  const realpaths = new Map<string, Promise<string>>();
+
+  cachingHost = {
+    ...NodeHost,
+    readFile: (path) =>
+      isLibraryFile(path)
+        ? memoize(files, path, () => NodeHost.readFile(path))
+        : NodeHost.readFile(path),
+    stat: (path) =>
+      isLibraryFile(path) ? memoize(stats, path, () => NodeHost.stat(path)) : NodeHost.stat(path),
+    realpath: (path) =>
+      isSpecFile(path)
+        ? NodeHost.realpath(path)
+        : memoize(realpaths, path, () => NodeHost.realpath(path)),
+  };
+  return cachingHost;
+}
+
 export async function compileSpec(
   task: CompileTask,
   ctx: RegenerateContext,
-): Promise<{ success: boolean; error?: string }> {
+): Promise<CompileResult> {
   const { spec, outputDir, options } = task;
+  const start = performance.now();
+  const elapsed = () => (performance.now() - start) / 1000;
 
   try {
     const compilerOptions = {
@@ -545,20 +665,23 @@ export async function compileSpec(
       },
     };
 
-    const program = await compile(NodeHost, spec, compilerOptions);
+    const program = await compile(getCachingHost(ctx), spec, compilerOptions, previousProgram);
+    previousProgram = program;
 
     if (program.hasError()) {
       const errors = program.diagnostics
         .filter((d) => d.severity === "error")
         .map((d) => d.message)
         .join("\n");
-      return { success: false, error: errors };
+      return { success: false, error: errors, duration: elapsed() };
     }
 
-    return { success: true };
+    const isSpecFile = getSpecFileFilter(ctx);
+    const sourceFiles = [...program.sourceFiles.keys()].filter(isSpecFile).sort();
+    return { success: true, sourceFiles, duration: elapsed() };
   } catch (err) {
     rmSync(outputDir, { recursive: true, force: true });
-    return { success: false, error: String(err) };
+    return { success: false, error: String(err), duration: elapsed() };
   }
 }
 
@@ -581,13 +704,209 @@ export function renderProgressBar(
   return `${successBar}${failBar}${emptyBar} ${pc.cyan(`${percent}%`)} (${completed}/${total})`;
 }
 
+// ---- Worker thread pool ----
+
+interface CompileRequest {
+  id: number;
+  task: CompileTask;
+}
+
+interface CompileResponse extends CompileResult {
+  id: number;
+}
+
+export interface WorkerSlot {
+  worker: Worker;
+  /** Number of times this slot's worker died and was replaced. */
+  restarts: number;
+  /** Set once the worker died too often; tasks sent to the slot fail with it. */
+  deadError?: string;
+  /** Number of task groups currently assigned to this worker. */
+  groups: number;
+  /** Specs of the task groups currently assigned to this worker. */
+  specs: Set<string>;
+  pending: Map<number, (result: CompileResult) => void>;
+}
+
+export interface CompilePool {
+  /**
+   * Pick the least busy worker for a new task group, preferring one that isn't
+   * already running another part of the same spec.
+   */
+  acquire(spec: string): WorkerSlot;
+  release(slot: WorkerSlot, spec: string): void;
+  compile(slot: WorkerSlot, task: CompileTask): Promise<CompileResult>;
+  close(): Promise<void>;
+}
+
+/** How often a worker that died is replaced before its slot gives up. */
+const MAX_WORKER_RESTARTS = 3;
+
+/**
+ * Spawn `size` worker threads that each run `compileSpec` for the tasks they
+ * receive.  The workers re-enter this module and are recognised through
+ * `workerData.regenerateWorker` (see the bottom of this file).  A worker that
+ * dies is replaced up to `MAX_WORKER_RESTARTS` times; after that (e.g. it
+ * fails at startup) its slot is retired and tasks sent to it fail at once.
+ */
+export function createCompilePool(size: number, ctx: RegenerateContext): CompilePool {
+  let nextId = 0;
+  let closing = false;
+
+  const startWorker = (slot: WorkerSlot) => {
+    const worker = new Worker(new URL(import.meta.url), {
+      workerData: { regenerateWorker: true, ctx },
+    });
+    const failPending = (error: string) => {
+      for (const resolvePending of slot.pending.values()) {
+        resolvePending({ success: false, error });
+      }
+      slot.pending.clear();
+    };
+    worker.on("message", (response: CompileResponse) => {
+      const resolvePending = slot.pending.get(response.id);
+      slot.pending.delete(response.id);
+      resolvePending?.({
+        success: response.success,
+        error: response.error,
+        sourceFiles: response.sourceFiles,
+        duration: response.duration,
+      });
+    });
+    worker.on("error", (err) => failPending(`Worker crashed: ${String(err)}`));
+    worker.on("exit", (code) => {
+      const error = `Worker exited with code ${code}`;
+      failPending(error);
+      if (closing) return;
+      if (slot.restarts >= MAX_WORKER_RESTARTS) {
+        slot.deadError = `${error} after ${slot.restarts} restarts`;
+        return;
+      }
+      // Replace the dead worker so the groups still assigned to it can go on.
+      slot.restarts++;
+      startWorker(slot);
+    });
+    slot.worker = worker;
+  };
+
+  const slots = Array.from({ length: Math.max(1, size) }, () => {
+    const slot = { restarts: 0, groups: 0, specs: new Set(), pending: new Map() } as WorkerSlot;
+    startWorker(slot);
+    return slot;
+  });
+
+  return {
+    acquire(spec) {
+      const alive = slots.filter((s) => !s.deadError);
+      const candidates = alive.length > 0 ? alive : slots;
+      const free = candidates.filter((s) => !s.specs.has(spec));
+      const slot = (free.length > 0 ? free : candidates).reduce((best, s) =>
+        s.groups < best.groups ? s : best,
+      );
+      slot.groups++;
+      slot.specs.add(spec);
+      return slot;
+    },
+    release(slot, spec) {
+      slot.groups--;
+      slot.specs.delete(spec);
+    },
+    compile(slot, task) {
+      if (slot.deadError) {
+        return Promise.resolve({ success: false, error: slot.deadError });
+      }
+      return new Promise((resolvePending) => {
+        const id = nextId++;
+        slot.pending.set(id, resolvePending);
+        slot.worker.postMessage({ id, task } satisfies CompileRequest);
+      });
+    },
+    async close() {
+      closing = true;
+      await Promise.all(slots.filter((s) => !s.deadError).map((s) => s.worker.terminate()));
+    },
+  };
+}
+
+// ---- Cost-aware scheduling ----
+
+export async function loadTimings(path: string): Promise<Record<string, number>> {
+  try {
+    return JSON.parse(await readFile(path, "utf8"));
+  } catch {
+    return {};
+  }
+}
+
+export async function saveTimings(path: string, timings: Record<string, number>): Promise<void> {
+  await mkdir(dirname(path), { recursive: true });
+  const sorted = Object.fromEntries(Object.entries(timings).sort(([a], [b]) => (a < b ? -1 : 1)));
+  await writeFile(path, JSON.stringify(sorted, null, 2) + "\n");
+}
+
+/**
+ * Split a group whose tasks write to distinct output folders into at most
+ * `parts` smaller groups, balanced by estimated cost.  Tasks of a group only
+ * have to run sequentially within one thread; `runParallel` keeps the parts on
+ * different workers, so they can run side by side.
+ */
+function splitGroup(group: TaskGroup, parts: number, cost: (t: CompileTask) => number) {
+  const outputDirs = new Set(group.tasks.map((t) => resolve(t.outputDir)));
+  if (parts < 2 || group.tasks.length < 2 || outputDirs.size !== group.tasks.length) {
+    return [group];
+  }
+
+  const buckets: { spec: string; tasks: CompileTask[]; cost: number }[] = Array.from(
+    { length: Math.min(parts, group.tasks.length) },
+    () => ({ spec: group.spec, tasks: [], cost: 0 }),
+  );
+  for (const task of [...group.tasks].sort((a, b) => cost(b) - cost(a))) {
+    const bucket = buckets.reduce((best, b) => (b.cost < best.cost ? b : best));
+    bucket.tasks.push(task);
+    bucket.cost += cost(task);
+  }
+  return buckets.map(({ spec, tasks }) => ({ spec, tasks }));
+}
+
+function runCompileWorker(ctx: RegenerateContext): void {
+  parentPort!.on("message", async ({ id, task }: CompileRequest) => {
+    const result = await compileSpec(task, ctx);
+    parentPort!.postMessage({ id, ...result } satisfies CompileResponse);
+  });
+}
+
 export async function runParallel(
   groups: TaskGroup[],
   maxJobs: number,
   ctx: RegenerateContext,
+  options: RunParallelOptions = {},
 ): Promise<Map<string, boolean>> {
   const results = new Map<string, boolean>();
   const executing: Set<Promise<void>> = new Set();
+  const taskCount = groups.reduce((sum, g) => sum + g.tasks.length, 0);
+  const workers = Math.min(options.workers ?? 0, maxJobs, taskCount);
+  const pool = workers > 0 ? createCompilePool(workers, ctx) : undefined;
+  // One group in flight per worker: compiles sharing an event loop would slow
+  // each other down and make their measured durations include the wait, and a
+  // group only picks its worker once one is free.  Without workers, compiles
+  // interleave on the main thread, so their durations are only trusted alone.
+  const concurrency = pool ? workers : maxJobs;
+  const measureDurations = pool !== undefined || maxJobs === 1;
+
+  // Longest-processing-time-first: start the groups that took longest last
+  // time, so a few huge specs don't begin at the very end and stretch the
+  // wall clock.  Tasks without history are assumed to be as slow as the
+  // slowest known one.
+  const timings = options.timings ?? {};
+  const previousTimings = { ...timings };
+  const knownCosts = Object.values(timings);
+  const unknownCost = knownCosts.length > 0 ? Math.max(...knownCosts) : 1;
+  const cost = (task: CompileTask) => timings[manifestKey(task, ctx)] ?? unknownCost;
+  const groupCost = (group: TaskGroup) => group.tasks.reduce((sum, t) => sum + cost(t), 0);
+  const schedule = (pool ? groups.flatMap((g) => splitGroup(g, workers, cost)) : groups)
+    .map((group) => ({ group, cost: groupCost(group) }))
+    .sort((a, b) => b.cost - a.cost)
+    .map(({ group }) => group);
 
   const totalTasks = groups.reduce((sum, g) => sum + g.tasks.length, 0);
   let completed = 0;
@@ -604,18 +923,24 @@ export async function runParallel(
 
   updateProgress();
 
-  for (const group of groups) {
+  for (const group of schedule) {
     // Each group runs as a unit - tasks within a group run sequentially
     // to avoid state pollution. Different groups run in parallel.
     const runGroup = async () => {
       const specDir = isAzureSpec(group.spec) ? ctx.azureHttpSpecs : ctx.httpSpecs;
       const shortName = toPosix(relative(specDir, dirname(group.spec)));
 
+      // All tasks of a group stay on the same worker so they still run in order.
+      const slot = pool?.acquire(group.spec);
       let groupSuccess = true;
       for (const task of group.tasks) {
         const packageName = (task.options["package-name"] as string) || shortName;
 
-        const result = await compileSpec(task, ctx);
+        const result = slot ? await pool!.compile(slot, task) : await compileSpec(task, ctx);
+        if (measureDurations && result.duration !== undefined) {
+          timings[manifestKey(task, ctx)] = result.duration;
+        }
+        if (result.sourceFiles) options.sourceFiles?.set(task, result.sourceFiles);
         completed++;
 
         if (!result.success) {
@@ -627,18 +952,21 @@ export async function runParallel(
         updateProgress();
       }
 
-      results.set(group.spec, groupSuccess);
+      if (slot) pool!.release(slot, group.spec);
+      // A split group reports success only if all of its parts succeeded.
+      results.set(group.spec, groupSuccess && (results.get(group.spec) ?? true));
     };
 
     const p = runGroup().finally(() => executing.delete(p));
     executing.add(p);
 
-    if (executing.size >= maxJobs) {
+    if (executing.size >= concurrency) {
       await Promise.race(executing);
     }
   }
 
   await Promise.all(executing);
+  await pool?.close();
 
   if (isTTY) {
     process.stdout.write("\r" + " ".repeat(60) + "\r");
@@ -651,6 +979,22 @@ export async function runParallel(
     }
   }
 
+  // Flag tasks that got noticeably slower than in the previous run.
+  const regressions = Object.entries(timings)
+    .filter(([key, seconds]) => {
+      const before = previousTimings[key];
+      return before !== undefined && seconds > before * 1.5 && seconds - before > 2;
+    })
+    .sort(([, a], [, b]) => b - a);
+  if (regressions.length > 0) {
+    console.log(pc.yellow(`\nSlower than the previous run:`));
+    for (const [key, seconds] of regressions.slice(0, 10)) {
+      console.log(
+        pc.yellow(`  • ${key}: ${previousTimings[key].toFixed(1)}s -> ${seconds.toFixed(1)}s`),
+      );
+    }
+  }
+
   return results;
 }
 
@@ -676,11 +1020,38 @@ export async function cleanGeneratedCode(generatedFolder: string): Promise<void>
   });
 }
 
+/**
+ * Same as `cleanGeneratedCode`, but limited to the given output folders.  Used
+ * by incremental regeneration so that only the packages about to be recompiled
+ * are cleared and every other folder is left untouched.
+ */
+export async function cleanOutputDirs(
+  generatedFolder: string,
+  outputDirs: string[],
+): Promise<void> {
+  const repoDir = resolve(generatedFolder, "..");
+  const existing = outputDirs.map((d) => resolve(d)).filter((d) => existsSync(d));
+  if (existing.length === 0) return;
+
+  execSync(`git clean -x -d -f -q -- ${existing.map((d) => `"${d}"`).join(" ")}`, {
+    cwd: repoDir,
+    stdio: ["ignore", "inherit", "inherit"],
+  });
+}
+
 /**
  * Pre-create the marker files that the test harness expects to find before
  * regeneration so it can verify they're cleared/preserved correctly.
+ *
+ * If `onlyPackages` is given, markers are only written into those package
+ * folders, so packages skipped by an incremental run don't pick up a
+ * `to_be_deleted.py` that nothing will remove.
  */
-export async function preprocess(flavor: string, generatedFolder: string): Promise<void> {
+export async function preprocess(
+  flavor: string,
+  generatedFolder: string,
+  onlyPackages?: Set<string>,
+): Promise<void> {
   if (flavor !== "azure") return;
 
   const testsGeneratedDir = resolve(generatedFolder, "../tests/generated/azure");
@@ -712,10 +1083,280 @@ export async function preprocess(flavor: string, generatedFolder: string): Promi
   ];
 
   await Promise.all(
-    entries.map(async ({ folder, file, content }) => {
-      const targetFolder = join(testsGeneratedDir, ...folder);
-      await mkdir(targetFolder, { recursive: true });
-      await writeFile(join(targetFolder, file), content);
+    entries
+      .filter(({ folder }) => !onlyPackages || onlyPackages.has(folder[0]))
+      .map(async ({ folder, file, content }) => {
+        const targetFolder = join(testsGeneratedDir, ...folder);
+        await mkdir(targetFolder, { recursive: true });
+        await writeFile(join(targetFolder, file), content);
+      }),
+  );
+}
+
+// ---- Incremental regeneration ----
+
+const MANIFEST_VERSION = 2;
+
+/** Directory names never included in content hashes. */
+const HASH_SKIP_DIRS = new Set(["node_modules", "__pycache__", "venv", ".venv", "build"]);
+
+/**
+ * Records, per output folder, the hash of the inputs it was last successfully
+ * generated from: the spec directory, every spec source file the compiled
+ * program loaded, the emitter options and the emitter build.  Output folders
+ * whose hash still matches can be skipped.
+ */
+export interface RegenerateManifest {
+  version: number;
+  /** Keyed by output folder relative to `pluginDir` (POSIX). */
+  outputs: Record<string, ManifestEntry>;
+}
+
+export interface ManifestEntry {
+  hash: string;
+  /**
+   * Spec source files of the last compile, relative to `pluginDir` (POSIX).
+   * Imports can reach outside the spec directory, so the next run re-hashes
+   * exactly these files to decide whether the output is stale.
+   */
+  sourceFiles: string[];
+}
+
+export function emptyManifest(): RegenerateManifest {
+  return { version: MANIFEST_VERSION, outputs: {} };
+}
+
+export async function loadManifest(path: string): Promise<RegenerateManifest> {
+  try {
+    const manifest = JSON.parse(await readFile(path, "utf8"));
+    if (manifest.version === MANIFEST_VERSION && manifest.outputs) {
+      return manifest;
+    }
+  } catch {
+    // Missing or unreadable manifest - every output is treated as stale.
+  }
+  return emptyManifest();
+}
+
+export async function saveManifest(path: string, manifest: RegenerateManifest): Promise<void> {
+  await mkdir(dirname(path), { recursive: true });
+  await writeFile(path, JSON.stringify(manifest, null, 2) + "\n");
+}
+
+export function manifestKey(task: CompileTask, ctx: RegenerateContext): string {
+  return toPosix(relative(ctx.pluginDir, resolve(task.outputDir)));
+}
+
+/** Feed every file under `dir` (sorted, with its relative path) into `hash`. */
+async function hashDirectory(dir: string, hash: Hash, root: string = dir): Promise<void> {
+  const items = await readdir(dir, { withFileTypes: true }).catch(() => []);
+  items.sort((a, b) => (a.name < b.name ? -1 : a.name > b.name ? 1 : 0));
+  for (const item of items) {
+    const itemPath = join(dir, item.name);
+    if (item.isDirectory()) {
+      if (!HASH_SKIP_DIRS.has(item.name)) {
+        await hashDirectory(itemPath, hash, root);
+      }
+    } else if (item.isFile()) {
+      hash.update(toPosix(relative(root, itemPath)));
+      hash.update("\0");
+      hash.update(await readFile(itemPath));
+      hash.update("\0");
+    }
+  }
+}
+
+/** Libraries whose build, besides the emitter's own, shapes the generated code. */
+const EXTRA_LIBRARIES = ["@typespec/spector"];
+
+/**
+ * Resolve the TypeSpec libraries the emitter compiles against: its peer
+ * dependencies (compiler, http, azure-core, TCGC, ...) plus the spector
+ * library the specs import.  Most are workspace packages, so they're
+ * resolved through the node_modules symlinks to their real directories.
+ */
+async function resolveLibraryDirs(ctx: RegenerateContext): Promise<string[]> {
+  const packageJson = JSON.parse(await readFile(join(ctx.pluginDir, "package.json"), "utf8"));
+  const names = [...Object.keys(packageJson.peerDependencies ?? {}), ...EXTRA_LIBRARIES].sort();
+  const dirs: string[] = [];
+  for (const name of names) {
+    const dir = join(ctx.pluginDir, "node_modules", ...name.split("/"));
+    if (existsSync(dir)) {
+      dirs.push(realpathSync(dir));
+    }
+  }
+  return dirs;
+}
+
+/**
+ * Fingerprint of the emitter build: this package's compiled output, the
+ * upstream http-client-python emitter and pygen generator it delegates to,
+ * and the `dist` and `lib` folders of every TypeSpec library it compiles
+ * against.  Any rebuild of one of them invalidates every manifest entry.
+ */
+export async function hashEmitterBuild(ctx: RegenerateContext): Promise<string> {
+  const hash = createHash("sha256");
+  const upstream = join(ctx.pluginDir, "node_modules", "@typespec", "http-client-python");
+  const dirs = [
+    join(ctx.pluginDir, "dist"),
+    join(ctx.pluginDir, "generator"),
+    join(upstream, "dist"),
+    join(upstream, "generator"),
+  ];
+  for (const libraryDir of await resolveLibraryDirs(ctx)) {
+    dirs.push(join(libraryDir, "dist"), join(libraryDir, "lib"));
+  }
+  for (const dir of dirs) {
+    hash.update(toPosix(relative(ctx.pluginDir, dir)));
+    await hashDirectory(dir, hash);
+  }
+  return hash.digest("hex");
+}
+
+function stableStringify(options: Record<string, unknown>): string {
+  const entries = Object.entries(options).sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0));
+  return JSON.stringify(Object.fromEntries(entries));
+}
+
+/**
+ * Hash the inputs every task is known to have before compiling: the directory
+ * containing the spec entry point (including its examples), the entry point
+ * name, the task's emitter options and the emitter build fingerprint.  The
+ * spec files a compile actually loads are added by `hashSourceFiles`.
+ */
+export async function computeTaskHashes(
+  groups: TaskGroup[],
+  emitterHash: string,
+): Promise<Map<CompileTask, string>> {
+  const hashes = new Map<CompileTask, string>();
+
+  await Promise.all(
+    groups.map(async (group) => {
+      const specHash = createHash("sha256");
+      specHash.update(basename(group.spec));
+      await hashDirectory(dirname(group.spec), specHash);
+      const specDigest = specHash.digest("hex");
+
+      for (const task of group.tasks) {
+        hashes.set(
+          task,
+          createHash("sha256")
+            .update(emitterHash)
+            .update(specDigest)
+            .update(stableStringify(task.options))
+            .digest("hex"),
+        );
+      }
     }),
   );
+
+  return hashes;
+}
+
+/**
+ * Combine a task's input hash with the content of the spec source files its
+ * compile loaded.  Files that no longer exist hash differently from any
+ * content, so deleting an import also makes the output stale.
+ */
+async function hashSourceFiles(
+  taskHash: string,
+  sourceFiles: string[],
+  ctx: RegenerateContext,
+): Promise<string> {
+  const hash = createHash("sha256").update(taskHash);
+  for (const file of sourceFiles) {
+    hash.update(file);
+    hash.update("\0");
+    hash.update(await readFile(resolve(ctx.pluginDir, file)).catch(() => "<missing>"));
+    hash.update("\0");
+  }
+  return hash.digest("hex");
+}
+
+/**
+ * Keep only the tasks whose inputs changed since the manifest was written (or
+ * whose output folder is missing).  Groups left without tasks are dropped.
+ */
+export async function selectStaleGroups(
+  groups: TaskGroup[],
+  hashes: Map<CompileTask, string>,
+  manifest: RegenerateManifest,
+  ctx: RegenerateContext,
+): Promise<TaskGroup[]> {
+  const isStale = async (task: CompileTask) => {
+    const entry = manifest.outputs[manifestKey(task, ctx)];
+    if (!entry || !existsSync(resolve(task.outputDir))) return true;
+    return (await hashSourceFiles(hashes.get(task)!, entry.sourceFiles, ctx)) !== entry.hash;
+  };
+  const stale: TaskGroup[] = [];
+  for (const group of groups) {
+    const staleness = await Promise.all(group.tasks.map(isStale));
+    const tasks = group.tasks.filter((_, i) => staleness[i]);
+    if (tasks.length > 0) {
+      stale.push({ spec: group.spec, tasks });
+    }
+  }
+  return stale;
+}
+
+/**
+ * Find the output folders under `flavorDir` recorded in the manifest that no
+ * current task writes to anymore (their spec was deleted, renamed or no
+ * longer opted in), and drop them from the manifest.  Returns the folders so
+ * the caller can clean them.
+ */
+export function takeRemovedOutputs(
+  manifest: RegenerateManifest,
+  groups: TaskGroup[],
+  flavorDir: string,
+  ctx: RegenerateContext,
+): string[] {
+  const prefix = toPosix(relative(ctx.pluginDir, resolve(flavorDir))) + "/";
+  const current = new Set(groups.flatMap((g) => g.tasks.map((t) => manifestKey(t, ctx))));
+  const removed: string[] = [];
+  for (const key of Object.keys(manifest.outputs)) {
+    if (key.startsWith(prefix) && !current.has(key)) {
+      delete manifest.outputs[key];
+      removed.push(resolve(ctx.pluginDir, key));
+    }
+  }
+  return removed;
+}
+
+/**
+ * Record the hashes and spec source files of the groups that compiled
+ * successfully and forget the ones that failed, so they're retried on the
+ * next incremental run.  A task without recorded source files (it compiled
+ * on an older build) is forgotten too rather than trusted on a partial hash.
+ */
+export async function updateManifest(
+  manifest: RegenerateManifest,
+  groups: TaskGroup[],
+  results: Map<string, boolean>,
+  hashes: Map<CompileTask, string>,
+  sourceFiles: Map<CompileTask, string[]>,
+  ctx: RegenerateContext,
+): Promise<void> {
+  for (const group of groups) {
+    const success = results.get(group.spec) === true;
+    for (const task of group.tasks) {
+      const key = manifestKey(task, ctx);
+      const files = sourceFiles.get(task);
+      if (success && files) {
+        const relativeFiles = files.map((file) => toPosix(relative(ctx.pluginDir, file)));
+        manifest.outputs[key] = {
+          hash: await hashSourceFiles(hashes.get(task)!, relativeFiles, ctx),
+          sourceFiles: relativeFiles,
+        };
+      } else {
+        delete manifest.outputs[key];
+      }
+    }
+  }
+}
+
+// ---- Worker entry point ----
+
+if (!isMainThread && workerData?.regenerateWorker) {
+  runCompileWorker(workerData.ctx);
 }
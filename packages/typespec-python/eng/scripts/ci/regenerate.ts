@@ -8,26 +8,54 @@
  * Python subprocess.  This single-phase pipeline is faster for the wrapper
  * use-case (azure flavor only, smaller spec set, Windows).
  *
- * Shared helpers/data live in `regenerate-common.ts` and are kept identical
- * with the upstream `@typespec/http-client-python` copy via `pnpm sync`.
+ * Task groups are spread across a pool of worker threads (`--workers`) so the
+ * CPU-bound checking of different specs runs on separate cores instead of
+ * sharing the main event loop.  Groups are started longest-first using the
+ * durations recorded in `temp/regenerate-timings.json` by previous runs, and
+ * groups with several emitter-option variants are split across workers.
+ *
+ * Output folders are snapshotted before they are cleaned, and files that come
+ * out byte-identical get their previous timestamps back (`output-snapshot.ts`).
+ *
+ * Shared helpers/data live in `regenerate-common.ts`, a copy of the upstream
+ * `@typespec/http-client-python` one that currently diverges from it (see
+ * its header).
  */
 
-import { platform } from "os";
-import { dirname, relative, resolve } from "path";
+import { availableParallelism, platform } from "os";
+import { basename, dirname, relative, resolve } from "path";
 import pc from "picocolors";
 import { fileURLToPath } from "url";
 import { parseArgs } from "util";
 
 import { isSpecEnabled, loadSpectorConfig, type SpectorConfig } from "@azure-tools/spector-runner";
 
+import {
+  type OutputSnapshot,
+  restoreUnchangedTimestamps,
+  snapshotOutput,
+} from "./output-snapshot.ts";
 import {
   buildTaskGroups,
   cleanGeneratedCode,
+  cleanOutputDirs,
+  type CompileTask,
+  computeTaskHashes,
+  emptyManifest,
   getSubdirectories,
+  hashEmitterBuild,
+  loadManifest,
+  loadTimings,
   preprocess,
   type RegenerateContext,
   type RegenerateFlags,
+  type RegenerateManifest,
   runParallel,
+  saveManifest,
+  saveTimings,
+  selectStaleGroups,
+  takeRemovedOutputs,
+  updateManifest,
 } from "./regenerate-common.ts";
 
 const argv = parseArgs({
@@ -40,6 +68,8 @@ const argv = parseArgs({
     emitterName: { type: "string" },
     generatedFolder: { type: "string" },
     jobs: { type: "string", short: "j" },
+    workers: { type: "string", short: "w" },
+    incremental: { type: "boolean", short: "i" },
     help: { type: "boolean", short: "h" },
   },
 });
@@ -70,6 +100,20 @@ ${pc.bold("Options:")}
   ${pc.cyan("-j, --jobs <n>")}
       Number of parallel compilation tasks (default: 30 on Linux/Mac, 10 on Windows).
 
+  ${pc.cyan("-w, --workers <n>")}
+      Number of worker threads the compilation tasks are spread across
+      (default: number of CPU cores). Each worker runs one compilation at
+      a time, so at most min(jobs, workers) run at once. Use 0 to compile
+      everything on the main thread.
+
+  ${pc.cyan("-i, --incremental")}
+      Only recompile specs whose inputs (spec directory, spec files it
+      imports from elsewhere, emitter options, emitter build or TypeSpec
+      library builds) changed since the last run, as recorded in
+      temp/regenerate-manifest.json. Output folders of unchanged specs are
+      left untouched instead of being cleaned, and output folders of specs
+      that no longer exist are removed.
+
   ${pc.cyan("-h, --help")}
       Show this help message.
 
@@ -85,6 +129,9 @@ ${pc.bold("Examples:")}
 
   ${pc.dim("# Regenerate with more parallelism")}
   node regenerate.ts --jobs 50
+
+  ${pc.dim("# Only regenerate what changed since the last run")}
+  node regenerate.ts --incremental
 `);
   process.exit(0);
 }
@@ -101,6 +148,12 @@ const GENERATED_FOLDER = argv.values.generatedFolder
   ? resolve(argv.values.generatedFolder)
   : resolve(PLUGIN_DIR, "generator");
 const EMITTER_NAME = argv.values.emitterName || "@azure-tools/typespec-python";
+// Input hashes of the last successful generation of each output folder. Lives
+// outside tests/generated so cleaning the generated code doesn't delete it.
+const MANIFEST_PATH = resolve(PLUGIN_DIR, "temp/regenerate-manifest.json");
+// Per-task compile durations from previous runs, used to schedule the most
+// expensive specs first. Compare it across runs to spot emitter regressions.
+const TIMINGS_PATH = resolve(PLUGIN_DIR, "temp/regenerate-timings.json");
 
 const ctx: RegenerateContext = {
   pluginDir: PLUGIN_DIR,
@@ -113,7 +166,7 @@ const ctx: RegenerateContext = {
 // Opt-in spec selection (see Azure/typespec-azure#4997). Only specs listed
 // with a truthy value in spector.config.yaml are generated; anything discovered on
 // disk but not opted in is skipped. Per-spec emitter options still come from the
-// upstream-synced option tables in regenerate-common.ts.
+// option tables in regenerate-common.ts, ported from upstream.
 const spectorConfig: SpectorConfig = loadSpectorConfig(resolve(PLUGIN_DIR, "spector.config.yaml"));
 
 function toPosix(p: string): string {
@@ -139,11 +192,23 @@ function filterOptedIn(specs: string[]): { kept: string[]; skipped: string[] } {
   return { kept, skipped };
 }
 
+interface IncrementalState {
+  manifest: RegenerateManifest;
+  emitterHash: string;
+  incremental: boolean;
+  timings: Record<string, number>;
+  // Files of the output folders before they were cleaned, so files that come
+  // out identical get their original timestamps back.
+  snapshot: OutputSnapshot;
+}
+
 async function regenerateFlavor(
   flavor: string,
   name: string | undefined,
   debug: boolean,
   jobs: number,
+  workers: number,
+  state: IncrementalState,
 ): Promise<boolean> {
   console.log(pc.cyan(`\n${"=".repeat(60)}`));
   console.log(pc.cyan(`Regenerating ${flavor} flavor`));
@@ -151,8 +216,6 @@ async function regenerateFlavor(
 
   const flags: RegenerateFlags = { flavor, debug, name };
 
-  await preprocess(flavor, GENERATED_FOLDER);
-
   const azureSpecs = flavor === "azure" ? await getSubdirectories(AZURE_HTTP_SPECS, flags) : [];
   const standardSpecs = await getSubdirectories(HTTP_SPECS, flags);
   const discovered = [...azureSpecs, ...standardSpecs];
@@ -162,16 +225,58 @@ async function regenerateFlavor(
     console.log(pc.yellow(`Skipping ${skipped.length} spec(s) not opted into spector.config.yaml`));
   }
 
-  const groups = buildTaskGroups(allSpecs, flags, ctx);
+  const allGroups = buildTaskGroups(allSpecs, flags, ctx);
+  const hashes = await computeTaskHashes(allGroups, state.emitterHash);
+
+  let groups = allGroups;
+  if (state.incremental) {
+    groups = await selectStaleGroups(allGroups, hashes, state.manifest, ctx);
+    const outputDirs = groups.flatMap((g) => g.tasks.map((t) => t.outputDir));
+    const upToDate = allGroups.reduce((sum, g) => sum + g.tasks.length, 0) - outputDirs.length;
+    if (upToDate > 0) {
+      console.log(pc.yellow(`Skipping ${upToDate} task(s) whose inputs are unchanged`));
+    }
+    // With a name filter the other specs are merely unselected, not removed.
+    if (!name) {
+      const flavorDir = resolve(GENERATED_FOLDER, "../tests/generated", flavor);
+      const removed = takeRemovedOutputs(state.manifest, allGroups, flavorDir, ctx);
+      if (removed.length > 0) {
+        console.log(pc.yellow(`Removing ${removed.length} output folder(s) of removed specs`));
+        await cleanOutputDirs(GENERATED_FOLDER, removed);
+        await saveManifest(MANIFEST_PATH, state.manifest);
+      }
+    }
+    for (const dir of outputDirs) {
+      await snapshotOutput(dir, state.snapshot);
+    }
+    await cleanOutputDirs(GENERATED_FOLDER, outputDirs);
+    await preprocess(flavor, GENERATED_FOLDER, new Set(outputDirs.map((d) => basename(d))));
+  } else {
+    await preprocess(flavor, GENERATED_FOLDER);
+  }
+
   const totalTasks = groups.reduce((sum, g) => sum + g.tasks.length, 0);
+  if (totalTasks === 0) {
+    console.log(pc.green(`Everything is up to date, nothing to compile\n`));
+    return true;
+  }
 
-  console.log(pc.cyan(`Found ${allSpecs.length} specs (${totalTasks} total tasks) to compile`));
-  console.log(pc.cyan(`Using ${jobs} parallel jobs\n`));
+  console.log(pc.cyan(`Found ${groups.length} specs (${totalTasks} total tasks) to compile`));
+  console.log(pc.cyan(`Using ${jobs} parallel jobs across ${workers || "no"} worker threads\n`));
 
   const startTime = performance.now();
-  const results = await runParallel(groups, jobs, ctx);
+  const sourceFiles = new Map<CompileTask, string[]>();
+  const results = await runParallel(groups, jobs, ctx, {
+    workers,
+    timings: state.timings,
+    sourceFiles,
+  });
   const duration = (performance.now() - startTime) / 1000;
 
+  await updateManifest(state.manifest, groups, results, hashes, sourceFiles, ctx);
+  await saveManifest(MANIFEST_PATH, state.manifest);
+  await saveTimings(TIMINGS_PATH, state.timings);
+
   const succeeded = Array.from(results.values()).filter((v) => v).length;
   const failed = results.size - succeeded;
 
@@ -192,11 +297,18 @@ async function main(): Promise<void> {
   // fewer parallel jobs to avoid I/O contention and memory pressure.
   const defaultJobs = isWindows ? 10 : 30;
   const jobs = argv.values.jobs ? parseInt(argv.values.jobs, 10) : defaultJobs;
+  const incremental = argv.values.incremental ?? false;
+  const workers = argv.values.workers ? parseInt(argv.values.workers, 10) : availableParallelism();
 
   console.log(pc.cyan(`\nRegeneration config:`));
   console.log(pc.cyan(`  Platform: ${isWindows ? "Windows" : "Unix"}`));
-  console.log(pc.cyan(`  Mode:     in-process compilation (single-phase)`));
+  console.log(
+    pc.cyan(
+      `  Mode:     in-process compilation (single-phase${incremental ? ", incremental" : ""})`,
+    ),
+  );
   console.log(pc.cyan(`  Jobs:     ${jobs}`));
+  console.log(pc.cyan(`  Workers:  ${workers}`));
   if (name) {
     console.log(pc.cyan(`  Filter:   ${name}`));
   }
@@ -205,15 +317,28 @@ async function main(): Promise<void> {
   const startTime = performance.now();
   let success: boolean;
 
-  await cleanGeneratedCode(GENERATED_FOLDER);
+  // A full run wipes every generated folder, so it starts from an empty
+  // manifest; an incremental run only cleans the folders it recompiles.
+  const state: IncrementalState = {
+    manifest: incremental ? await loadManifest(MANIFEST_PATH) : emptyManifest(),
+    emitterHash: await hashEmitterBuild(ctx),
+    incremental,
+    timings: await loadTimings(TIMINGS_PATH),
+    snapshot: new Map(),
+  };
+  if (!incremental) {
+    await snapshotOutput(resolve(GENERATED_FOLDER, "../tests/generated"), state.snapshot);
+    await cleanGeneratedCode(GENERATED_FOLDER);
+  }
 
   if (flavor) {
-    success = await regenerateFlavor(flavor, name, debug, jobs);
+    success = await regenerateFlavor(flavor, name, debug, jobs, workers, state);
   } else {
-    const azureSuccess = await regenerateFlavor("azure", name, debug, jobs);
-    const unbrandedSuccess = await regenerateFlavor("unbranded", name, debug, jobs);
+    const azureSuccess = await regenerateFlavor("azure", name, debug, jobs, workers, state);
+    const unbrandedSuccess = await regenerateFlavor("unbranded", name, debug, jobs, workers, state);
     success = azureSuccess && unbrandedSuccess;
   }
+  await restoreUnchangedTimestamps(state.snapshot);
 
   const totalDuration = (performance.now() - startTime) / 1000;
   console.log(
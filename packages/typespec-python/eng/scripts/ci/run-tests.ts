@@ -1,6 +1,7 @@
 /* eslint-disable no-console */
 import { ChildProcess, spawn } from "child_process";
 import fs from "fs";
+import { createServer } from "net";
 import { cpus } from "os";
 import { dirname, join } from "path";
 import pc from "picocolors";
@@ -9,6 +10,9 @@ import { parseArgs } from "util";
 
 const root = join(dirname(fileURLToPath(import.meta.url)), "../../../");
 const testsDir = join(root, "tests");
+// The pipeline uploads spector coverage from here.
+const coverageDir = join(root, "node_modules", "@azure-tools", "azure-http-specs");
+const coverageFile = join(coverageDir, "spec-coverage.json");
 
 const argv = parseArgs({
   args: process.argv.slice(2),
@@ -74,7 +78,12 @@ interface ToxResult {
   error?: string;
 }
 
-async function runToxEnv(env: string, pythonPath: string, name?: string): Promise<ToxResult> {
+async function runToxEnv(
+  env: string,
+  pythonPath: string,
+  name?: string,
+  extraEnv: Record<string, string> = {},
+): Promise<ToxResult> {
   const startTime = Date.now();
 
   console.log(`${pc.blue("[START]")} ${env}`);
@@ -90,6 +99,7 @@ async function runToxEnv(env: string, pythonPath: string, name?: string): Promis
   const envVars = {
     ...process.env,
     FLAVOR: flavor,
+    ...extraEnv,
   };
 
   return new Promise((resolve) => {
@@ -142,6 +152,7 @@ async function runParallel(
   pythonPath: string,
   maxJobs: number,
   name?: string,
+  envVars: Record<string, Record<string, string>> = {},
 ): Promise<ToxResult[]> {
   const results: ToxResult[] = [];
   const running: Map<string, Promise<ToxResult>> = new Map();
@@ -155,7 +166,7 @@ async function runParallel(
     }
 
     // Start new task
-    const task = runToxEnv(env, pythonPath, name);
+    const task = runToxEnv(env, pythonPath, name, envVars[env]);
     running.set(env, task);
   }
 
@@ -166,6 +177,70 @@ async function runParallel(
   return results;
 }
 
+// Ask the OS for a free port for a test env's mock server.
+function getFreePort(): Promise<number> {
+  return new Promise((resolve, reject) => {
+    const server = createServer();
+    server.once("error", reject);
+    server.listen(0, () => {
+      const address = server.address();
+      const port = typeof address === "object" && address ? address.port : 0;
+      server.close(() => resolve(port));
+    });
+  });
+}
+
+interface CoverageReport {
+  scenariosMetadata?: { packageName?: string };
+  results?: Record<string, string>;
+  [key: string]: unknown;
+}
+
+// A scenario counts as covered if any flavor passed it.
+const coverageRank = ["pass", "fail"];
+
+function rankOf(status: string): number {
+  const rank = coverageRank.indexOf(status);
+  return rank === -1 ? coverageRank.length : rank;
+}
+
+// Merge the coverage files written by the concurrent mock servers into spec-coverage.json,
+// keeping the results it already holds (e.g. from a run of the other flavor).
+function mergeCoverageFiles(files: string[], target: string): void {
+  const existing = files.filter((file) => fs.existsSync(file));
+  if (existing.length === 0) {
+    return;
+  }
+  const merged = new Map<string, CoverageReport>();
+  let isArray = false;
+  const sources = fs.existsSync(target) ? [target, ...existing] : existing;
+  for (const file of sources) {
+    const data = JSON.parse(fs.readFileSync(file, "utf-8"));
+    isArray ||= Array.isArray(data);
+    const reports: CoverageReport[] = Array.isArray(data) ? data : [data];
+    reports.forEach((report, index) => {
+      const key = report.scenariosMetadata?.packageName ?? String(index);
+      const current = merged.get(key);
+      if (!current) {
+        merged.set(key, { ...report, results: { ...report.results } });
+        return;
+      }
+      for (const [scenario, status] of Object.entries(report.results ?? {})) {
+        const previous = current.results![scenario];
+        if (previous === undefined || rankOf(status) < rankOf(previous)) {
+          current.results![scenario] = status;
+        }
+      }
+    });
+    if (file !== target) {
+      fs.rmSync(file);
+    }
+  }
+  const reports = [...merged.values()];
+  fs.writeFileSync(target, JSON.stringify(isArray ? reports : reports[0], null, 2));
+  console.log(`Merged ${existing.length} coverage files into ${target}`);
+}
+
 function printSummary(results: ToxResult[]): void {
   console.log("\n" + pc.bold("═".repeat(60)));
   console.log(pc.bold(" Test Results Summary"));
@@ -219,8 +294,8 @@ async function main(): Promise<void> {
     process.exit(1);
   }
 
-  // Determine flavors (default to both and "unbranded" first then "azure" so that spec-coverage.json
-  // could record all results in one run)
+  // Determine flavors (default to both; the coverage of their test envs is merged into
+  // spec-coverage.json so it records all results in one run)
   const flavors = argv.values.flavor === "all" ? ["unbranded", "azure"] : [argv.values.flavor!];
 
   // Determine environments
@@ -253,7 +328,7 @@ async function main(): Promise<void> {
   }
 
   // Separate test environments from other environments
-  // Test environments must run sequentially (they share port 3000)
+  // Test environments each get their own mock server port and coverage file
   // Other environments (lint, mypy, pyright, docs) can run in parallel
   const testEnvs = envs.filter((e) => e.startsWith("test-"));
   const otherEnvs = envs.filter((e) => !e.startsWith("test-"));
@@ -264,43 +339,67 @@ async function main(): Promise<void> {
 
   console.log(`  Flavors:      ${flavors.join(", ")}`);
   console.log(`  Environments: ${envs.join(", ")}`);
-  console.log(`  Jobs:         ${maxJobs} (test envs run sequentially, others in parallel)`);
+  console.log(`  Jobs:         ${maxJobs} (test envs run together, others in parallel)`);
   if (argv.values.name) {
     console.log(`  Filter:       ${argv.values.name}`);
   }
   console.log();
 
   // Pre-build wheels for each flavor so tox envs install from pre-built
-  // wheels instead of rebuilding from source (~2min build once vs ~2min × N envs)
-  console.log(pc.cyan("Pre-building wheels for all flavors..."));
-  const installScript = join(testsDir, "install_packages.py");
-  for (const flavor of flavors) {
-    const wheelStartTime = Date.now();
-    const proc = spawn(pythonPath, [installScript, "build", flavor, testsDir], {
-      cwd: testsDir,
-      stdio: "inherit",
-    });
-    await new Promise<void>((resolve) => {
-      proc.on("close", (code) => {
-        const duration = ((Date.now() - wheelStartTime) / 1000).toFixed(1);
-        if (code === 0) {
-          console.log(`${pc.green("[PASS]")} wheel build ${flavor} (${duration}s)`);
-        } else {
-          console.log(
-            `${pc.yellow("[WARN]")} wheel build ${flavor} failed (${duration}s), tox envs will build from source`,
-          );
-        }
-        resolve();
+  // wheels instead of rebuilding from source. Builds run in parallel and only
+  // packages whose content changed since their last wheel are rebuilt.
+  // Test, mypy, pyright and sphinx envs link the generated sources through a
+  // .pth file instead, so wheels are only needed for the other envs.
+  const linkedEnvs = ["test", "mypy", "pyright", "sphinx"];
+  if (expandedEnvs.some((env) => !linkedEnvs.includes(env))) {
+    console.log(pc.cyan("Pre-building wheels for all flavors..."));
+    const installScript = join(testsDir, "install_packages.py");
+    for (const flavor of flavors) {
+      const wheelStartTime = Date.now();
+      const proc = spawn(pythonPath, [installScript, "build", flavor, testsDir], {
+        cwd: testsDir,
+        stdio: "inherit",
       });
-    });
+      await new Promise<void>((resolve) => {
+        proc.on("close", (code) => {
+          const duration = ((Date.now() - wheelStartTime) / 1000).toFixed(1);
+          if (code === 0) {
+            console.log(`${pc.green("[PASS]")} wheel build ${flavor} (${duration}s)`);
+          } else {
+            console.log(
+              `${pc.yellow("[WARN]")} wheel build ${flavor} failed (${duration}s), tox envs will build from source`,
+            );
+          }
+          resolve();
+        });
+      });
+    }
   }
   console.log();
 
-  // Run test environments first (sequentially)
+  // Run test environments first, all at once: each starts its own mock server on a
+  // free port and writes its own coverage file, merged into spec-coverage.json after.
   let results: ToxResult[] = [];
   if (testEnvs.length > 0) {
-    console.log(pc.cyan("Running test environments (sequential)..."));
-    results = await runParallel(testEnvs, pythonPath, 1, argv.values.name);
+    console.log(pc.cyan("Running test environments (concurrent)..."));
+    const testEnvVars: Record<string, Record<string, string>> = {};
+    for (const env of testEnvs) {
+      testEnvVars[env] = {
+        MOCK_SERVER_PORT: String(await getFreePort()),
+        MOCK_SERVER_COVERAGE_FILE: join(coverageDir, `spec-coverage-${env}.json`),
+      };
+    }
+    results = await runParallel(
+      testEnvs,
+      pythonPath,
+      testEnvs.length,
+      argv.values.name,
+      testEnvVars,
+    );
+    mergeCoverageFiles(
+      testEnvs.map((env) => testEnvVars[env].MOCK_SERVER_COVERAGE_FILE),
+      coverageFile,
+    );
   }
 
   // Run other environments in parallel
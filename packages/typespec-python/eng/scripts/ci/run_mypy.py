@@ -57,4 +57,4 @@ def _single_dir_mypy(mod, retries=2):
 
 
 if __name__ == "__main__":
-    run_check("mypy", _single_dir_mypy, "MyPy")
+    run_check("mypy", _single_dir_mypy, "MyPy", cache_files=[get_config_file_location()])
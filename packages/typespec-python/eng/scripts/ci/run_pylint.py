@@ -9,10 +9,13 @@
 # a failure may be suppressed.
 
 from subprocess import check_call, CalledProcessError
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import io
 import os
 import logging
 import sys
-from util import run_check, get_package_namespace_dir
+from util import run_check, get_package_namespace_dir, _timed_call
 
 logging.getLogger().setLevel(logging.INFO)
 
@@ -26,19 +29,12 @@ def get_rfc_file_location():
     return os.path.join(os.path.dirname(__file__), "config/pylintrc")
 
 
-def _single_dir_pylint(mod):
-    inner_class = get_package_namespace_dir(mod)
-    if not inner_class:
-        logging.info(f"No package directory found in {mod}, skipping")
-        return True
+def _pylint_args(mod, inner_class):
     # Only load the Azure pylint guidelines checker plugin for azure packages.
     # The plugin (azure-pylint-guidelines-checker) is only installed in the
     # lint-azure tox environment and is not available for unbranded packages.
     is_azure = "azure" in mod.parts
     pylint_args = [
-        sys.executable,
-        "-m",
-        "pylint",
         "--rcfile={}".format(get_rfc_file_location()),
         "--evaluation=(max(0, 0 if fatal else 10.0 - ((float(5 * error + warning + refactor + convention + info)/ statement) * 10)))",
         "--output-format=parseable",
@@ -58,17 +54,82 @@ def _single_dir_pylint(mod):
     if extra_disables:
         pylint_args.append("--disable={}".format(",".join(extra_disables)))
     pylint_args.append(str(inner_class.absolute()))
+    return pylint_args
+
+
+def _single_dir_pylint(mod):
+    inner_class = get_package_namespace_dir(mod)
+    if not inner_class:
+        logging.info(f"No package directory found in {mod}, skipping")
+        return True
     try:
-        check_call(pylint_args)
+        check_call([sys.executable, "-m", "pylint"] + _pylint_args(mod, inner_class))
         return True
     except CalledProcessError as e:
         logging.error("{} exited with linting error {}".format(str(inner_class.absolute()), e.returncode))
         return False
 
 
+def _in_process_pylint(mod):
+    """Lint one package with pylint running inside the current worker process.
+
+    The worker lints many packages in a row, so the interpreter, pylint and the guidelines
+    checker plugin stay loaded between them. Generated packages share namespace roots
+    (``generation``, ``specs``, ``typetest``), so astroid's caches are cleared and
+    ``sys.path`` is restored around each package; otherwise a root cached from one
+    package would hide the next package's modules and the results would differ from
+    subprocess mode. ``Run`` is left to compute the exit code (including ``--fail-under``
+    on the evaluation score) exactly as the command line does, and it's taken from the
+    ``SystemExit`` it raises.
+    """
+    from astroid import MANAGER  # pylint: disable=import-outside-toplevel
+    from pylint.lint import Run  # pylint: disable=import-outside-toplevel
+
+    inner_class = get_package_namespace_dir(mod)
+    if not inner_class:
+        logging.info(f"No package directory found in {mod}, skipping")
+        return True
+    # Buffer the parseable output so packages linted in parallel don't interleave.
+    output = io.StringIO()
+    status = 0
+    saved_sys_path = list(sys.path)
+    MANAGER.clear_cache()
+    try:
+        with contextlib.redirect_stdout(output):
+            Run(_pylint_args(mod, inner_class))
+    except SystemExit as e:
+        # Usage errors exit with 32 before linting anything, which is a failure like any other.
+        status = e.code if isinstance(e.code, int) else 1
+    except Exception as e:  # pylint: disable=broad-except
+        logging.error("{} raised exception in pylint: {}".format(str(inner_class.absolute()), e))
+        return False
+    finally:
+        sys.path[:] = saved_sys_path
+        print(output.getvalue(), end="", flush=True)
+    if status:
+        logging.error("{} exited with linting error {}".format(str(inner_class.absolute()), status))
+        return False
+    return True
+
+
+def _batch_pylint(mods, jobs, durations):
+    """Lint all packages, in the given order, on ``jobs`` long-lived pylint worker processes."""
+    results = {}
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {mod: executor.submit(_timed_call, _in_process_pylint, mod) for mod in mods}
+        for mod, future in futures.items():
+            try:
+                results[mod], durations[mod] = future.result()
+            except Exception as e:  # pylint: disable=broad-except
+                # A worker that dies breaks the pool (BrokenProcessPool) and fails every unfinished package.
+                logging.error("{} raised exception in pylint worker: {}".format(mod.name, e))
+                results[mod] = False
+    return results
+
+
 if __name__ == "__main__":
     if os.name == "nt":
         # Before https://github.com/microsoft/typespec/issues/4759 fixed, skip running Pylint for now on Windows
         logging.info("Skip running Pylint on Windows for now")
         sys.exit(0)
-    run_check("pylint", _single_dir_pylint, "Pylint")
+    run_check("pylint", _single_dir_pylint, "Pylint", _batch_pylint, cache_files=[get_rfc_file_location()])
@@ -10,10 +10,11 @@
 
 from subprocess import run, TimeoutExpired
 import os
+import re
 import logging
 import sys
 from pathlib import Path
-from util import run_check, SKIP_PACKAGE_DIRS
+from util import run_check, get_package_leaf_dir, ROOT_FOLDER, SKIP_PACKAGE_DIRS
 
 logging.getLogger().setLevel(logging.INFO)
 
@@ -23,9 +24,24 @@ SPHINX_CONF_DIR = os.path.abspath(os.path.dirname(__file__))
 # Timeout for each sphinx build (seconds)
 SPHINX_TIMEOUT = 120
 
+# Timeout for the single sphinx build of all packages in --batch mode (seconds)
+SPHINX_BATCH_TIMEOUT = 30 * 60
 
-def _create_minimal_index_rst(docs_dir, package_name, module_names):
-    """Create a minimal index.rst file for sphinx to process."""
+# Aggregate (--batch) builds keep their sources, doctrees and output here, one folder per flavor.
+SPHINX_BATCH_FOLDER = Path(ROOT_FOLDER) / ".sphinx"
+
+# Module names sphinx mentions in warnings that don't carry a source location.
+WARNING_MODULE_PATTERN = re.compile(
+    r"(?:docstring of |failed to import (?:module |object )?')([\w.]+)(?:' from module '([\w.]+))?"
+)
+
+
+def _package_rst_content(package_name, module_names, no_index=()):
+    """Build the reST document that autodocs ``module_names`` under a ``package_name`` title.
+
+    Modules in ``no_index`` are documented by another package of the same project too, so
+    they're marked ``:no-index:`` instead of being reported as duplicate object descriptions.
+    """
     index_rst_content = f"""{package_name}
 {"=" * len(package_name)}
 
@@ -40,17 +56,22 @@ def _create_minimal_index_rst(docs_dir, package_name, module_names):
    :members:
    :undoc-members:
    :show-inheritance:
-
 """
+        if module_name in no_index:
+            index_rst_content += "   :no-index:\n"
+        index_rst_content += "\n"
+    return index_rst_content
+
 
+def _create_minimal_index_rst(docs_dir, package_name, module_names):
+    """Create a minimal index.rst file for sphinx to process."""
     index_rst_path = docs_dir / "index.rst"
     with open(index_rst_path, "w") as f:
-        f.write(index_rst_content)
-
+        f.write(_package_rst_content(package_name, module_names))
 
-def _single_dir_sphinx(mod):
-    """Run sphinx-build on a single package directory."""
 
+def _find_module_names(mod):
+    """Return the modules to document for a package directory, or ``None`` if it has no package."""
     # Find the actual Python package directories
     package_dirs = [
         d
@@ -62,8 +83,7 @@ def _single_dir_sphinx(mod):
     ]
 
     if not package_dirs:
-        logging.info(f"No Python package found in {mod}, skipping sphinx build")
-        return True
+        return None
 
     # Get the main package directory
     main_package = package_dirs[0]
@@ -77,6 +97,32 @@ def _single_dir_sphinx(mod):
     # If no submodules, just use the main package
     if not module_names:
         module_names = [main_package.name]
+    return module_names
+
+
+def _find_leaf_module_names(mod):
+    """Return the package's own leaf module and its subpackages, or ``None`` if it has no package.
+
+    Unlike ``_find_module_names``, namespace parents shared with other packages (``typetest.model``,
+    ``specs.azure``) are skipped, so documents of one project don't describe them once per package.
+    """
+    leaf = get_package_leaf_dir(mod)
+    if not leaf or not (leaf / "__init__.py").exists():
+        return None
+    leaf_name = ".".join(leaf.relative_to(mod).parts)
+    return [leaf_name] + sorted(
+        f"{leaf_name}.{item.name}"
+        for item in leaf.iterdir()
+        if item.is_dir() and item.name not in SKIP_PACKAGE_DIRS and (item / "__init__.py").exists()
+    )
+
+
+def _single_dir_sphinx(mod):
+    """Run sphinx-build on a single package directory."""
+    module_names = _find_module_names(mod)
+    if not module_names:
+        logging.info(f"No Python package found in {mod}, skipping sphinx build")
+        return True
 
     # Create docs directory structure
     docs_dir = mod / "docs"
@@ -128,5 +174,137 @@ def _single_dir_sphinx(mod):
             sys.path.remove(str(mod.absolute()))
 
 
+def _write_if_changed(path, content):
+    """Write ``content`` to ``path`` only if it differs, so sphinx's cached doctree stays valid."""
+    if path.exists() and path.read_text() == content:
+        return
+    path.write_text(content)
+
+
+def _warning_owners(line, documents, modules):
+    """Return the packages a sphinx warning line belongs to, or an empty list if none is known."""
+    rst_match = re.match(r"(.*?)\.rst:", line)
+    if rst_match and Path(rst_match.group(1)).name in documents:
+        return [documents[Path(rst_match.group(1)).name]]
+    name_match = WARNING_MODULE_PATTERN.search(line)
+    if not name_match:
+        return []
+    name = name_match.group(1)
+    if name_match.group(2):
+        name = f"{name_match.group(2)}.{name}"
+    matches = [module for module in modules if name == module or name.startswith(module + ".")]
+    if not matches:
+        return []
+    # The most specific module wins; packages documenting the same module share the warning.
+    return modules[max(matches, key=len)]
+
+
+def _batch_sphinx(mods, jobs, durations):
+    """Validate the docstrings of all packages with one parallel sphinx build.
+
+    Every package becomes one document of a single project, built with ``jobs`` processes into a
+    persistent doctree cache, so the core libraries are imported once and unchanged packages
+    aren't read again. Each document covers the package's leaf namespace; a module documented
+    by several packages is only indexed by the first one. Warnings are attributed back to the
+    package whose document or module they mention. Packages that fail get their document
+    touched so the next build re-reads them and reports their warnings again instead of
+    trusting the cached doctree. Sphinx schedules the documents itself, so ``durations`` is
+    unused.
+    """
+    results = {}
+    documents = {}
+    package_modules = {}
+    modules = {}
+    for mod in sorted(mods, key=lambda mod: mod.name):
+        module_names = _find_leaf_module_names(mod)
+        if not module_names:
+            logging.info(f"No Python package found in {mod}, skipping sphinx build")
+            results[mod] = True
+            continue
+        documents[mod.name] = mod
+        package_modules[mod] = module_names
+        for module_name in module_names:
+            modules.setdefault(module_name, []).append(mod)
+    if not documents:
+        return results
+
+    # One project per flavor: azure and unbranded envs have different core libraries.
+    build_root = SPHINX_BATCH_FOLDER / next(iter(documents.values())).parent.name
+    source_dir = build_root / "source"
+    try:
+        source_dir.mkdir(parents=True, exist_ok=True)
+        for stale in source_dir.glob("*.rst"):
+            if stale.stem != "index" and stale.stem not in documents:
+                stale.unlink()
+        for mod, module_names in package_modules.items():
+            no_index = {name for name in module_names if modules[name][0] != mod}
+            content = _package_rst_content(mod.stem, module_names, no_index)
+            _write_if_changed(source_dir / f"{mod.name}.rst", content)
+        toctree = "".join(f"   {name}\n" for name in sorted(documents))
+        index_content = f"Generated packages\n==================\n\n.. toctree::\n   :hidden:\n\n{toctree}"
+        _write_if_changed(source_dir / "index.rst", index_content)
+        result = run(
+            [
+                sys.executable,
+                "-m",
+                "sphinx",
+                "-b",
+                "html",
+                "-c",
+                SPHINX_CONF_DIR,
+                "-W",
+                "--keep-going",
+                "-j",
+                str(jobs),  # Read packages in parallel
+                "-d",
+                str(build_root / "doctrees"),  # Persistent doctree cache
+                "-q",
+                str(source_dir),
+                str(build_root / "html"),
+            ],
+            capture_output=True,
+            timeout=SPHINX_BATCH_TIMEOUT,
+        )
+    except TimeoutExpired:
+        logging.error(f"sphinx timed out after {SPHINX_BATCH_TIMEOUT}s")
+        return {mod: False for mod in mods}
+    except Exception as e:
+        logging.error(f"sphinx error: {e}")
+        return {mod: False for mod in mods}
+
+    messages = {mod: [] for mod in documents.values()}
+    unattributed = []
+    owners = []
+    for line in result.stderr.decode().splitlines():
+        if re.search(r"\b(WARNING|ERROR|CRITICAL):", line):
+            owners = _warning_owners(line, documents, modules)
+        # Lines without a level continue the previous message (e.g. import tracebacks).
+        for owner in owners:
+            messages[owner].append(line)
+        if not owners:
+            unattributed.append(line)
+
+    for mod, lines in messages.items():
+        results[mod] = not lines
+        if lines:
+            logging.error("{} sphinx error:\n{}".format(mod.stem, "\n".join(lines)))
+            os.utime(source_dir / f"{mod.name}.rst")
+    if unattributed:
+        logging.error("sphinx errors outside of any package:\n{}".format("\n".join(unattributed)))
+    if result.returncode and all(results.values()):
+        # sphinx failed but no package owns the errors: don't report a false pass.
+        logging.error(f"sphinx exited with {result.returncode}")
+        for mod in documents.values():
+            os.utime(source_dir / f"{mod.name}.rst")
+        return {mod: False for mod in mods}
+    return results
+
+
 if __name__ == "__main__":
-    run_check("sphinx", _single_dir_sphinx, "Sphinx documentation build")
+    run_check(
+        "sphinx",
+        _single_dir_sphinx,
+        "Sphinx documentation build",
+        _batch_sphinx,
+        cache_files=[os.path.join(SPHINX_CONF_DIR, "conf.py")],
+    )
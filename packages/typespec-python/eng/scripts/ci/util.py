@@ -5,9 +5,14 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 import os
+import sys
+import json
+import time
 import logging
+import hashlib
 from pathlib import Path
 import argparse
+from importlib import metadata
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
 logging.getLogger().setLevel(logging.INFO)
@@ -21,6 +26,22 @@ IGNORE_FOLDER = []
 # These are auto-generated test/sample scaffolding, not the actual SDK code.
 SKIP_PACKAGE_DIRS = {"generated_tests", "generated_samples", "build", "__pycache__", ".pytest_cache"}
 
+# Passing checks are recorded here, one empty marker file per cache key.
+CHECK_CACHE_FOLDER = Path(ROOT_FOLDER) / ".check-cache"
+
+# Outputs the checks themselves write into a package; they must not affect its cache key.
+CACHE_IGNORED_DIRS = SKIP_PACKAGE_DIRS | {"docs", "_build", ".mypy_cache"}
+
+# Distributions whose version is part of the cache key, besides the core libraries.
+TOOL_PACKAGES = {
+    "pylint": ["pylint", "azure-pylint-guidelines-checker"],
+    "apiview": ["apiview-stub-generator"],
+}
+CORE_PACKAGES = ["azure-core", "azure-mgmt-core", "corehttp"]
+
+# Number of packages listed in the slowest-packages report after each run.
+TAIL_REPORT_SIZE = 5
+
 
 def get_package_namespace_dir(mod):
     """Find the actual namespace directory inside a generated package, skipping non-SDK dirs."""
@@ -35,7 +56,164 @@ def get_package_namespace_dir(mod):
     return None
 
 
-def run_check(name, call_back, log_info):
+def _is_namespace_init(directory):
+    """Whether ``directory`` only declares a namespace that other packages may extend."""
+    init = directory / "__init__.py"
+    if not init.exists():
+        return True
+    content = init.read_text(encoding="utf-8")
+    if "extend_path" in content or "declare_namespace" in content:
+        return True
+    return all(not line.strip() or line.lstrip().startswith("#") for line in content.splitlines())
+
+
+def get_package_leaf_dir(mod):
+    """Find the directory holding a generated package's own code, below the namespace parents it shares.
+
+    Packages like ``typetest-model-usage`` and ``typetest-model-notdiscriminated`` both ship
+    ``typetest/__init__.py`` and ``typetest/model/__init__.py``; tools that see several packages at once
+    must only look at each package's leaf (``typetest/model/usage``) to not see those parents twice.
+    """
+    leaf = get_package_namespace_dir(mod)
+    while leaf is not None and _is_namespace_init(leaf):
+        children = [
+            child
+            for child in leaf.iterdir()
+            if child.name != "__init__.py" and child.name not in SKIP_PACKAGE_DIRS and not child.name.startswith(".")
+        ]
+        if len(children) != 1 or not children[0].is_dir():
+            break
+        leaf = children[0]
+    return leaf
+
+
+def _version(distribution):
+    try:
+        return metadata.version(distribution)
+    except metadata.PackageNotFoundError:
+        return "-"
+
+
+def _environment_key(name, cache_files):
+    """Hash everything besides the package itself that a check result depends on."""
+    digest = hashlib.sha256()
+    digest.update(f"{name}\0{sys.version}\0".encode())
+    for distribution in TOOL_PACKAGES.get(name, [name]) + CORE_PACKAGES:
+        digest.update(f"{distribution}=={_version(distribution)}\0".encode())
+    # The runner script and this module define how the tool is invoked.
+    for path in sorted({os.path.abspath(sys.argv[0]), os.path.abspath(__file__), *cache_files}):
+        digest.update(path.encode())
+        if os.path.isfile(path):
+            digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def package_cache_key(mod, environment_key):
+    """Content hash of a package's files combined with the environment key."""
+    digest = hashlib.sha256(environment_key.encode())
+    for root, dirnames, filenames in os.walk(mod):
+        dirnames[:] = sorted(
+            d for d in dirnames if d not in CACHE_IGNORED_DIRS and not d.startswith(".") and not d.endswith("egg-info")
+        )
+        for filename in sorted(filenames):
+            path = Path(root) / filename
+            digest.update(path.relative_to(mod).as_posix().encode() + b"\0")
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _parse_shard(value):
+    """Parse a 1-based ``i/n`` shard spec into a ``(index, count)`` tuple with a 0-based index."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected 'i/n'")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected 1 <= i <= n")
+    return index - 1, count
+
+
+def _load_timings(path):
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_timings(path, timings):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(json.dumps(timings, indent=2, sort_keys=True))
+    os.replace(temp_path, path)
+
+
+def _package_costs(dirs, timings):
+    """Recorded duration of each package; unknown packages are assumed as slow as the slowest known one."""
+    default = max((timings[d.name] for d in dirs if d.name in timings), default=1.0)
+    return {d: timings.get(d.name, default) for d in dirs}
+
+
+def _select_shard(dirs, costs, index, count):
+    """Split ``dirs`` into ``count`` shards of similar total cost and return shard ``index``.
+
+    The split only depends on the package names and ``costs``, so every CI machine sharing
+    the same timings file computes the same shards.
+    """
+    loads = [0.0] * count
+    shards = [[] for _ in range(count)]
+    for d in sorted(dirs, key=lambda d: (-costs[d], d.name)):
+        target = min(range(count), key=lambda i: (loads[i], i))
+        loads[target] += costs[d]
+        shards[target].append(d)
+    return shards[index]
+
+
+def _timed_call(call_back, mod):
+    start = time.monotonic()
+    passed = call_back(mod)
+    return passed, time.monotonic() - start
+
+
+def _report_tail(name, durations, completions, started, jobs):
+    """Log the slowest packages and how long the run waited on stragglers with workers idle.
+
+    ``completions`` may be empty when the tool didn't report when each package finished, in
+    which case only the slowest packages are logged.
+    """
+    if not durations:
+        return
+    wall_time = (completions[-1] if completions else time.monotonic()) - started
+    slowest = sorted(durations.items(), key=lambda item: item[1], reverse=True)[:TAIL_REPORT_SIZE]
+    logging.info(
+        f"{name} took {wall_time:.1f}s, slowest packages: "
+        + ", ".join(f"{pkg.stem} ({duration:.1f}s)" for pkg, duration in slowest)
+    )
+    if not completions:
+        return
+    # From the moment fewer packages are left than workers, every completion leaves a worker idle.
+    tail = completions[max(0, len(completions) - jobs) :]
+    idle = sum(completions[-1] - completed for completed in tail)
+    logging.info(
+        f"Waited {completions[-1] - tail[0]:.1f}s on the last {len(tail) - 1} stragglers "
+        f"({idle:.1f} idle worker-seconds)"
+    )
+
+
+def run_check(name, call_back, log_info, batch_call_back=None, cache_files=()):
+    """Run ``call_back`` on every generated package of the requested flavor.
+
+    ``batch_call_back``, if given, takes the whole list of package directories (longest
+    first), the ``--jobs`` value and a dict to record per-package durations in, and returns a
+    ``{package_dir: passed}`` dict. It's used instead of ``call_back`` when ``--batch`` is
+    passed, for tools that are much cheaper when one process handles many packages.
+
+    Packages whose content, tool version and ``cache_files`` (tool configuration) are
+    unchanged since their last pass are skipped, unless ``--no-cache`` is passed.
+
+    Each package's duration is recorded per tool and flavor, in batch mode for the tools
+    that can measure it. Packages are dispatched longest-first, and ``--shard i/n`` splits
+    them across machines by that recorded cost.
+    """
     parser = argparse.ArgumentParser(
         description=f"Run {name} against target folder. Add a local custom plugin to the path prior to execution. "
     )
@@ -71,6 +249,29 @@ def run_check(name, call_back, log_info):
         default=max(1, os.cpu_count()),
     )
 
+    if batch_call_back:
+        parser.add_argument(
+            "--batch",
+            dest="batch",
+            help=f"Run {name} over all packages in as few tool processes as possible instead of one per package.",
+            action="store_true",
+        )
+
+    parser.add_argument(
+        "--shard",
+        dest="shard",
+        help="Only process shard i of n (e.g. '2/4'), with packages split by their recorded duration.",
+        type=_parse_shard,
+        required=False,
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        help=f"Run {name} on every package, even if it passed before with the same content.",
+        action="store_false",
+    )
+
     args = parser.parse_args()
 
     # Path structure: tests/generated/{test_folder}/
@@ -79,28 +280,88 @@ def run_check(name, call_back, log_info):
     if args.file_name:
         dirs = [d for d in dirs if args.file_name.lower() in d.stem.lower()]
 
+    timings_path = CHECK_CACHE_FOLDER / name / f"timings-{args.test_folder}.json"
+    timings = _load_timings(timings_path)
+    costs = _package_costs(dirs, timings)
+    if args.shard:
+        # Shard before skipping cached packages so all machines agree on the split.
+        index, count = args.shard
+        dirs = _select_shard(dirs, costs, index, count)
+        logging.info(f"Shard {index + 1}/{count}: {len(dirs)} packages")
+
     if not dirs:
         logging.info("No directories to process")
         return
 
-    logging.info(f"Processing {len(dirs)} packages with {args.jobs} parallel jobs...")
-
     failed = []
     succeeded = 0
 
+    cache_keys = {}
+    cache_folder = CHECK_CACHE_FOLDER / name
+    if args.use_cache:
+        environment_key = _environment_key(name, cache_files)
+        cache_keys = {d: package_cache_key(d, environment_key) for d in dirs}
+        cached = [d for d in dirs if (cache_folder / cache_keys[d]).exists()]
+        if cached:
+            logging.info(f"Skipping {len(cached)} packages that passed {name} before with identical content")
+            succeeded += len(cached)
+            dirs = [d for d in dirs if d not in cached]
+        if not dirs:
+            _report(log_info, succeeded, failed)
+            return
+
+    def record(pkg, passed):
+        nonlocal succeeded
+        if not passed:
+            failed.append(pkg.stem)
+            return
+        succeeded += 1
+        if pkg in cache_keys:
+            cache_folder.mkdir(parents=True, exist_ok=True)
+            (cache_folder / cache_keys[pkg]).touch()
+
+    # Longest first, so the biggest packages don't start last and stretch the tail.
+    dirs = sorted(dirs, key=lambda d: costs[d], reverse=True)
+    durations = {}
+    completions = []
+    started = time.monotonic()
+
+    if batch_call_back and args.batch:
+        logging.info(f"Processing {len(dirs)} packages in a single {name} run...")
+        results = batch_call_back(dirs, args.jobs, durations)
+        for pkg in dirs:
+            record(pkg, results.get(pkg, False))
+        _record_timings(name, timings_path, timings, durations, completions, started, args.jobs)
+        _report(log_info, succeeded, failed)
+        return
+
+    logging.info(f"Processing {len(dirs)} packages with {args.jobs} parallel jobs...")
+
     with ProcessPoolExecutor(max_workers=args.jobs) as executor:
-        futures = {executor.submit(call_back, d): d for d in dirs}
+        futures = {executor.submit(_timed_call, call_back, d): d for d in dirs}
         for future in as_completed(futures):
             pkg = futures[future]
+            completions.append(time.monotonic())
             try:
-                if future.result():
-                    succeeded += 1
-                else:
-                    failed.append(pkg.stem)
+                passed, durations[pkg] = future.result()
+                record(pkg, passed)
             except Exception as e:
                 logging.error(f"{pkg.stem} raised exception: {e}")
                 failed.append(pkg.stem)
 
+    _record_timings(name, timings_path, timings, durations, completions, started, args.jobs)
+    _report(log_info, succeeded, failed)
+
+
+def _record_timings(name, timings_path, timings, durations, completions, started, jobs):
+    """Record the measured package durations for the next run and report the slowest ones."""
+    if durations:
+        timings.update({pkg.name: round(duration, 3) for pkg, duration in durations.items()})
+        _save_timings(timings_path, timings)
+    _report_tail(name, durations, completions, started, jobs)
+
+
+def _report(log_info, succeeded, failed):
     logging.info(f"{log_info}: {succeeded} succeeded, {len(failed)} failed")
 
     if failed:
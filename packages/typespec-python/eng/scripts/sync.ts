@@ -18,6 +18,7 @@
  *   node eng/scripts/sync.ts          # write mode: overwrite local files
  *   node eng/scripts/sync.ts --check  # check mode: exit non-zero on drift (CI)
  */
+import { createHash } from "crypto";
 import fs from "fs";
 import { dirname, join, relative, sep } from "path";
 import pc from "picocolors";
@@ -61,16 +62,6 @@ const INCLUDES: readonly string[] = [
 
   // Shared CI runners (invoked by run-tests.ts via tox)
   "eng/scripts/ci/run_apiview.py",
-  "eng/scripts/ci/run_mypy.py",
-  "eng/scripts/ci/run_pylint.py",
-  "eng/scripts/ci/run_pyright.py",
-  "eng/scripts/ci/run_sphinx_build.py",
-  "eng/scripts/ci/util.py",
-
-  // Shared regenerate helpers/data tables.  Per-repo orchestration (paths,
-  // emitter name, single-phase vs two-phase pipeline, argv/help) lives in
-  // each repo's own `regenerate.ts` and is intentionally *not* synced.
-  "eng/scripts/ci/regenerate-common.ts",
 
   // NOTE: eng/scripts/setup/* is intentionally NOT synced. Those scripts
   // (install.py, prepare.py, venvtools.py, etc.) diverged from upstream's
@@ -91,6 +82,10 @@ const INCLUDES: readonly string[] = [
   //                                   the upstream script is fixed (see
   //                                   microsoft/typespec#10636) it can be
   //                                   re-added to this list.
+  //   - the CI runners and regenerate helpers in FORKED_FILES below: the
+  //                                   wrapper owns forks of them, and sync
+  //                                   reports upstream changes that still
+  //                                   need to be ported by hand.
 
   // Shared test assets. Directory entries (trailing `/`) are recursive and
   // **mirror** the upstream layout: files matching upstream are overwritten,
@@ -140,6 +135,37 @@ const EXCLUDED_FILES: ReadonlySet<string> = new Set([
   "tests/mock_api/unbranded/asynctests/test_unbranded_async.py",
 ]);
 
+/**
+ * Upstream files this package deliberately forks instead of syncing, mapped to
+ * the SHA-256 of the upstream revision the fork was last reconciled with.
+ *
+ * The wrapper's CI runners add result caching, --batch, --shard and
+ * longest-first scheduling, and regenerate-common.ts adds worker threads,
+ * incremental manifests and timings; none of this is upstream yet, so syncing
+ * would revert it. Sync never copies these files, but it hashes the upstream
+ * copy and reports any file whose upstream content no longer matches the
+ * recorded hash (a failure in --check mode). To reconcile:
+ *
+ *   1. diff core/packages/http-client-python/<path> against the upstream
+ *      revision recorded here and port the change into the local fork;
+ *   2. replace the recorded hash with the one sync printed.
+ *
+ * Once upstream carries the same changes (sync reports the fork as
+ * identical), move the path back to INCLUDES and drop it from here.
+ */
+const FORKED_FILES: Readonly<Record<string, string>> = {
+  "eng/scripts/ci/util.py": "25b1f4d0c0c36b8973b2ab5304f2d3b532e2b53c7c7069f863e48f29fb7a1e10",
+  "eng/scripts/ci/run_mypy.py": "7e379d7474b2e6d8a335e751e035ab6e393d7748510eb2d80e4402a78efe8eb0",
+  "eng/scripts/ci/run_pylint.py":
+    "593ce9a1a4527aacf7f8894fa7bd900448e57855ba239574ebd3dae624b9dce1",
+  "eng/scripts/ci/run_pyright.py":
+    "b418cae121003d19523db8f1963a70fc0c1318f24f611eeb945f4b3f8ecba632",
+  "eng/scripts/ci/run_sphinx_build.py":
+    "21ae29b4ea33061678f1987631b978a6b5f7619fdd1ba11dbbabae52a0009030",
+  "eng/scripts/ci/regenerate-common.ts":
+    "c49fa4140a796fddb9f4150b19ed41bde4863bef48eb15f98fb3bb23e1a4fc0d",
+};
+
 const argv = parseArgs({
   args: process.argv.slice(2),
   options: {
@@ -187,6 +213,8 @@ interface SyncStats {
   drifted: string[]; // only populated in --check mode
   missing: string[]; // listed in INCLUDES but not present in the source package
   removed: string[]; // local-only files inside a synced directory (mirror)
+  forksChanged: string[]; // FORKED_FILES whose upstream moved since the last reconcile
+  forksRetired: string[]; // FORKED_FILES now identical to upstream
 }
 
 /**
@@ -320,6 +348,28 @@ function syncFile(srcAbs: string, destAbs: string, relPath: string, stats: SyncS
   stats.copied.push(relPath);
 }
 
+/** Compare the upstream copy of each forked file with its last reconciled revision. */
+function checkForkedFiles(stats: SyncStats): void {
+  for (const [relPath, reconciledHash] of Object.entries(FORKED_FILES)) {
+    const srcBuf = readBytes(join(sourceRoot, ...relPath.split("/")));
+    if (!srcBuf) {
+      stats.missing.push(relPath);
+      continue;
+    }
+    const destBuf = readBytes(join(packageRoot, ...relPath.split("/")));
+    if (destBuf && destBuf.equals(srcBuf)) {
+      stats.forksRetired.push(relPath);
+      continue;
+    }
+    const upstreamHash = createHash("sha256").update(srcBuf).digest("hex");
+    if (upstreamHash !== reconciledHash) {
+      stats.forksChanged.push(`${relPath} (upstream is now ${upstreamHash})`);
+    } else {
+      stats.unchanged.push(relPath);
+    }
+  }
+}
+
 function listFilesRecursive(dir: string): string[] {
   if (!fs.existsSync(dir)) return [];
   const out: string[] = [];
@@ -375,7 +425,15 @@ function main(): void {
   console.log(pc.bold("Mode:") + " " + (check ? "check (read-only)" : "write"));
   console.log("");
 
-  const stats: SyncStats = { copied: [], unchanged: [], drifted: [], missing: [], removed: [] };
+  const stats: SyncStats = {
+    copied: [],
+    unchanged: [],
+    drifted: [],
+    missing: [],
+    removed: [],
+    forksChanged: [],
+    forksRetired: [],
+  };
 
   for (const entry of INCLUDES) {
     const isDir = entry.endsWith("/");
@@ -439,6 +497,8 @@ function main(): void {
   // Special-case merge: update only the marked generated fixture ignore rules.
   syncGitignore(join(sourceRoot, ".gitignore"), join(packageRoot, ".gitignore"), stats);
 
+  checkForkedFiles(stats);
+
   if (stats.copied.length) {
     console.log(pc.green(pc.bold(`Copied (${stats.copied.length}):`)));
     for (const f of stats.copied) console.log("  " + f);
@@ -455,8 +515,31 @@ function main(): void {
     console.log(pc.yellow(pc.bold(`Missing in source (${stats.missing.length}):`)));
     for (const f of stats.missing) console.log("  " + f);
   }
+  if (stats.forksChanged.length) {
+    console.log(pc.red(pc.bold(`Forked files changed upstream (${stats.forksChanged.length}):`)));
+    for (const f of stats.forksChanged) console.log("  " + f);
+    console.log(
+      pc.dim("  Port the upstream change by hand, then record the new hash in FORKED_FILES."),
+    );
+  }
+  if (stats.forksRetired.length) {
+    console.log(
+      pc.cyan(pc.bold(`Forked files now identical to upstream (${stats.forksRetired.length}):`)),
+    );
+    for (const f of stats.forksRetired) console.log("  " + f);
+    console.log(pc.dim("  Move them from FORKED_FILES back to INCLUDES."));
+  }
   console.log(pc.dim(`Unchanged: ${stats.unchanged.length}`));
 
+  if (check && stats.forksChanged.length > 0) {
+    console.error(
+      pc.red(
+        `\nForked files changed in core/packages/http-client-python.\n` +
+          `Reconcile them as described on FORKED_FILES in eng/scripts/sync.ts.`,
+      ),
+    );
+    process.exit(1);
+  }
   if (check && (stats.drifted.length > 0 || stats.missing.length > 0)) {
     console.error(
       pc.red(
@@ -4,6 +4,8 @@
 # license information.
 # --------------------------------------------------------------------------
 import os
+import json
+import socket
 import subprocess
 import signal
 import time
@@ -12,6 +14,7 @@ import urllib.error
 import tempfile
 import pytest
 import importlib
+import inspect
 from pathlib import Path
 from filelock import FileLock
 
@@ -19,14 +22,34 @@ from filelock import FileLock
 ROOT = Path(__file__).parent.parent
 DATA_FOLDER = Path(__file__).parent / "mock_api" / "shared"
 
-# Server configuration
+# Server configuration. run-tests.ts gives every test env its own port (and coverage file)
+# so flavors can run concurrently; without it the server runs on the default port.
 SERVER_HOST = "localhost"
-SERVER_PORT = 3000
+DEFAULT_SERVER_PORT = 3000
+DEFAULT_SERVER_URL = f"http://{SERVER_HOST}:{DEFAULT_SERVER_PORT}"
+SERVER_PORT = int(os.environ.get("MOCK_SERVER_PORT", DEFAULT_SERVER_PORT))
 SERVER_URL = f"http://{SERVER_HOST}:{SERVER_PORT}"
+COVERAGE_FILE = os.environ.get("MOCK_SERVER_COVERAGE_FILE")
 
 # Lock file for coordinating server startup across xdist workers
-LOCK_FILE = Path(tempfile.gettempdir()) / "http_client_python_test_server.lock"
-PID_FILE = Path(tempfile.gettempdir()) / "http_client_python_test_server.pid"
+LOCK_FILE = Path(tempfile.gettempdir()) / f"http_client_python_test_server_{SERVER_PORT}.lock"
+# Registry of the server running on SERVER_PORT, so later sessions can reuse it
+REGISTRY_FILE = Path(tempfile.gettempdir()) / f"http_client_python_test_server_{SERVER_PORT}.json"
+# Output of a server kept alive across sessions, which must not hold on to the session's output
+LOG_FILE = Path(tempfile.gettempdir()) / f"http_client_python_test_server_{SERVER_PORT}.log"
+
+# Preload that makes the spawned server report when it is listening
+READY_SCRIPT = Path(__file__).parent / "mock_server_ready.cjs"
+SERVER_START_TIMEOUT = 60
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--keep-mock-server",
+        action="store_true",
+        default=False,
+        help="Leave the mock API server running after the session so the next session reuses it.",
+    )
 
 
 def wait_for_server(url: str, timeout: int = 60, interval: float = 0.5) -> bool:
@@ -45,7 +68,53 @@ def wait_for_server(url: str, timeout: int = 60, interval: float = 0.5) -> bool:
     return False
 
 
-def start_server_process():
+def is_server_healthy() -> bool:
+    """Check once whether the mock server on SERVER_PORT answers HTTP requests."""
+    try:
+        urllib.request.urlopen(SERVER_URL, timeout=1)
+        return True
+    except urllib.error.HTTPError:
+        return True  # Server is up but returned an error (e.g., 404) - that's fine
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def _process_start_time(pid: int):
+    """Return when process ``pid`` started, as reported by the OS, or None if it isn't running.
+
+    Together with the pid this identifies the server process: a pid reused by an unrelated
+    process after the server exited has a different start time.
+    """
+    if os.name == "nt":
+        command = ["powershell", "-NoProfile", "-Command", f"(Get-Process -Id {pid}).StartTime.ToFileTimeUtc()"]
+    else:
+        command = ["ps", "-o", "lstart=", "-p", str(pid)]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=False, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result.stdout.strip() if result.returncode == 0 and result.stdout.strip() else None
+
+
+def read_registry():
+    """Return the registry entry of the server started for SERVER_PORT, dropping a stale one.
+
+    The entry is only returned while its pid still belongs to the process that was
+    registered, so it is safe to kill.
+    """
+    try:
+        entry = json.loads(REGISTRY_FILE.read_text())
+    except (OSError, ValueError):
+        return None
+    pid = entry.get("pid")
+    started = entry.get("started")
+    if entry.get("port") == SERVER_PORT and pid and started and _process_start_time(pid) == started:
+        return entry
+    REGISTRY_FILE.unlink(missing_ok=True)
+    return None
+
+
+def start_server_process(ready_address: str = "", log_file=None):
     """Start the tsp-spector mock API server.
 
     Always serves both azure-http-specs and http-specs regardless of flavor.
@@ -59,16 +128,35 @@ def start_server_process():
     cwd = azure_http_path.resolve()
     azure_specs = str(cwd / "specs").replace("\\", "/")
     http_specs = str((http_path / "specs").resolve()).replace("\\", "/")
-    cmd = f"npx tsp-spector serve {azure_specs} {http_specs}"
+    cmd = f"npx tsp-spector serve {azure_specs} {http_specs} --port {SERVER_PORT}"
+    if COVERAGE_FILE:
+        cmd += f' --coverageFile "{COVERAGE_FILE}"'
 
     # Add node_modules/.bin to PATH
     env = os.environ.copy()
     node_bin = str(ROOT / "node_modules" / ".bin")
     env["PATH"] = f"{node_bin}{os.pathsep}{env.get('PATH', '')}"
+    if ready_address:
+        env["MOCK_SERVER_READY_ADDRESS"] = ready_address
+        env["NODE_OPTIONS"] = f'{env.get("NODE_OPTIONS", "")} --require "{READY_SCRIPT}"'.strip()
 
+    output = {"stdout": log_file, "stderr": subprocess.STDOUT} if log_file else {}
     if os.name == "nt":
-        return subprocess.Popen(cmd, shell=True, cwd=str(cwd), env=env)
-    return subprocess.Popen(cmd, shell=True, cwd=str(cwd), env=env, preexec_fn=os.setsid)
+        return subprocess.Popen(cmd, shell=True, cwd=str(cwd), env=env, **output)
+    return subprocess.Popen(cmd, shell=True, cwd=str(cwd), env=env, preexec_fn=os.setsid, **output)
+
+
+def _kill_process_tree(pid: int) -> None:
+    if os.name == "nt":
+        # On Windows, use taskkill to kill the entire process tree
+        # process.kill() only kills the shell, not the child node process
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(pid)],
+            capture_output=True,
+            check=False,
+        )
+    else:
+        os.killpg(os.getpgid(pid), signal.SIGTERM)
 
 
 def terminate_server_process(process):
@@ -76,16 +164,7 @@ def terminate_server_process(process):
     if process is None:
         return
     try:
-        if os.name == "nt":
-            # On Windows, use taskkill to kill the entire process tree
-            # process.kill() only kills the shell, not the child node process
-            subprocess.run(
-                ["taskkill", "/F", "/T", "/PID", str(process.pid)],
-                capture_output=True,
-                check=False,
-            )
-        else:
-            os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+        _kill_process_tree(process.pid)
     except ProcessLookupError:
         pass  # Process already terminated
     except Exception:
@@ -96,17 +175,38 @@ def terminate_server_process(process):
             pass
 
 
-def graceful_stop_server(timeout: float = 30.0) -> None:
-    """Gracefully stop the mock server so it writes its coverage file.
+def start_server_and_wait_until_ready(log_file=None):
+    """Start the mock server and block until it reports that it listens on SERVER_PORT.
 
-    The tsp-spector server only persists spec-coverage.json from its process
-    ``exit`` handler, which is triggered by the ``tsp-spector server stop``
-    command (it posts to the ``/.admin/stop`` admin endpoint and the server then
-    calls ``process.exit(0)``). A hard kill of the process skips that handler and
-    leaves no coverage file. Stopping the server via the CLI here lets coverage
-    be written by the test run itself, so no extra pipeline step is required to
-    flush coverage before uploading it.
+    The server is started with mock_server_ready.cjs preloaded, which connects back to a
+    socket opened here as soon as the server listens, so readiness costs no polling.
+    Returns the server process, or None if it exited or never became ready.
     """
+    with socket.create_server(("127.0.0.1", 0)) as listener:
+        process = start_server_process(f"127.0.0.1:{listener.getsockname()[1]}", log_file)
+        deadline = time.time() + SERVER_START_TIMEOUT
+        while time.time() < deadline:
+            # Wake up every second only to notice a server that died during startup.
+            listener.settimeout(min(1.0, max(deadline - time.time(), 0.01)))
+            try:
+                connection, _ = listener.accept()
+            except socket.timeout:
+                if process.poll() is not None:
+                    return None
+                continue
+            with connection:
+                connection.settimeout(5)
+                reported_port = connection.makefile().readline().strip()
+            if reported_port == str(SERVER_PORT):
+                return process
+        # The preload may not have been loaded (e.g. NODE_OPTIONS is restricted): last resort.
+        if is_server_healthy():
+            return process
+        terminate_server_process(process)
+        return None
+
+
+def _stop_server_with_cli() -> None:
     env = os.environ.copy()
     node_bin = str(ROOT / "node_modules" / ".bin")
     env["PATH"] = f"{node_bin}{os.pathsep}{env.get('PATH', '')}"
@@ -122,19 +222,98 @@ def graceful_stop_server(timeout: float = 30.0) -> None:
         )
     except Exception:
         # Server already stopped or never started — nothing to do.
-        return
+        pass
+
 
-    # Coverage is written synchronously in the server's exit handler. Wait until
-    # the server is no longer reachable to ensure the file is flushed to disk.
-    deadline = time.time() + timeout
-    while time.time() < deadline:
+def graceful_stop_server(timeout: float = 30.0) -> None:
+    """Gracefully stop the mock server so it writes its coverage file.
+
+    The tsp-spector server only persists spec-coverage.json from its process
+    ``exit`` handler, which is triggered by the ``tsp-spector server stop``
+    command (it posts to the ``/.admin/stop`` admin endpoint and the server then
+    calls ``process.exit(0)``). A hard kill of the process skips that handler and
+    leaves no coverage file. Stopping the server here lets coverage be written by
+    the test run itself, so no extra pipeline step is required to flush coverage
+    before uploading it.
+
+    The stop request is posted to the admin endpoint directly, falling back to the
+    CLI only if the endpoint is rejected. An idle connection opened beforehand is
+    closed by the server process as it exits, which signals that coverage is flushed.
+    """
+    try:
+        watcher = socket.create_connection((SERVER_HOST, SERVER_PORT), timeout=1)
+    except OSError:
+        return  # Server already stopped or never started — nothing to do.
+    with watcher:
         try:
-            urllib.request.urlopen(SERVER_URL, timeout=1)
+            urllib.request.urlopen(urllib.request.Request(f"{SERVER_URL}/.admin/stop", method="POST"), timeout=5)
         except urllib.error.HTTPError:
-            pass  # Server up but returned an error response — still running.
+            _stop_server_with_cli()
         except (urllib.error.URLError, OSError):
-            return  # Server is down — coverage has been flushed.
-        time.sleep(0.3)
+            pass  # The server may drop the connection as it exits.
+        watcher.settimeout(timeout)
+        try:
+            watcher.recv(1)  # Returns once the server process has exited.
+        except OSError:
+            pass
+
+
+# Default transports of the core libraries; the tests don't pass their own.
+DEFAULT_TRANSPORTS = (
+    ("azure.core.pipeline.transport", "RequestsTransport"),
+    ("azure.core.pipeline.transport", "AioHttpTransport"),
+    ("corehttp.transport.requests", "RequestsTransport"),
+    ("corehttp.transport.aiohttp", "AioHttpTransport"),
+)
+
+
+def _redirect_to_server_url(request):
+    rest = request.url[len(DEFAULT_SERVER_URL) :]
+    if request.url.startswith(DEFAULT_SERVER_URL) and rest[:1] in ("", "/", "?"):
+        request.url = SERVER_URL + rest
+
+
+def _redirecting_send(send):
+    if inspect.iscoroutinefunction(send):
+
+        async def async_wrapper(self, request, **kwargs):
+            _redirect_to_server_url(request)
+            return await send(self, request, **kwargs)
+
+        return async_wrapper
+
+    def wrapper(self, request, **kwargs):
+        _redirect_to_server_url(request)
+        return send(self, request, **kwargs)
+
+    return wrapper
+
+
+def pytest_configure(config):
+    """Point clients at this run's mock server when it isn't on the default port.
+
+    The generated clients default to ``http://localhost:3000`` and the synced tests under
+    ``mock_api/`` pass that endpoint explicitly. New tests should take it from the
+    ``server_url`` fixture; for the existing ones, the public ``send`` of the core libraries'
+    default transports (which every request, paging and polling call goes through) rewrites
+    the request URL. The run stops rather than silently hitting another server on the
+    default port when no transport can be wrapped.
+    """
+    if SERVER_PORT == DEFAULT_SERVER_PORT:
+        return
+    patched = []
+    for module_name, transport_name in DEFAULT_TRANSPORTS:
+        try:
+            transport = getattr(importlib.import_module(module_name), transport_name)
+        except (ImportError, AttributeError):
+            continue
+        transport.send = _redirecting_send(transport.send)
+        patched.append(f"{module_name}.{transport_name}")
+    if not patched:
+        raise pytest.UsageError(
+            f"MOCK_SERVER_PORT={SERVER_PORT} is set, but no core library transport could be "
+            f"wrapped to redirect {DEFAULT_SERVER_URL} to {SERVER_URL}"
+        )
 
 
 def pytest_unconfigure(config):
@@ -148,30 +327,52 @@ def pytest_unconfigure(config):
     """
     if hasattr(config, "workerinput"):
         return  # xdist worker — leave the shared server running for others.
+    if config.getoption("--keep-mock-server"):
+        return  # Left running (and registered) for the next session.
     graceful_stop_server()
+    REGISTRY_FILE.unlink(missing_ok=True)
+
+
+@pytest.fixture(scope="session")
+def server_url() -> str:
+    """Endpoint of this run's mock server (``MOCK_SERVER_PORT``, port 3000 by default)."""
+    return SERVER_URL
 
 
 @pytest.fixture(scope="session", autouse=True)
-def testserver():
+def testserver(request):
     """Start the mock API server, coordinated across xdist workers via file lock.
 
     The first process to acquire the lock starts the server; others wait for it.
+    A server registered by an earlier session (``--keep-mock-server``) that is
+    still alive and healthy is reused instead of starting a new one.
     The server is intentionally NOT killed in teardown — with xdist, the owning
     worker may finish before others, killing the server prematurely. The server
     is cleaned up when the tox/parent process exits.
     """
     # Check if server is already running
-    if not wait_for_server(SERVER_URL, timeout=1, interval=0.1):
+    if not is_server_healthy():
         lock = FileLock(str(LOCK_FILE), timeout=120)
         try:
             with lock:
                 # Double-check after acquiring lock
-                if not wait_for_server(SERVER_URL, timeout=1, interval=0.1):
-                    server = start_server_process()
-                    PID_FILE.write_text(str(server.pid))
-                    if not wait_for_server(SERVER_URL, timeout=60):
-                        terminate_server_process(server)
+                if not is_server_healthy():
+                    registered = read_registry()
+                    if registered:
+                        # Our registered server, still running but not answering: replace it.
+                        try:
+                            _kill_process_tree(registered["pid"])
+                        except OSError:
+                            pass
+                    if request.config.getoption("--keep-mock-server"):
+                        with open(LOG_FILE, "w") as log_file:
+                            server = start_server_and_wait_until_ready(log_file)
+                    else:
+                        server = start_server_and_wait_until_ready()
+                    if server is None:
                         pytest.fail(f"Mock API server failed to start at {SERVER_URL}")
+                    entry = {"pid": server.pid, "port": SERVER_PORT, "started": _process_start_time(server.pid)}
+                    REGISTRY_FILE.write_text(json.dumps(entry))
         except TimeoutError:
             if not wait_for_server(SERVER_URL, timeout=5):
                 pytest.fail("Timeout waiting for server lock")
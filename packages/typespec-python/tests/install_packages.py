@@ -1,18 +1,34 @@
 #!/usr/bin/env python
 """Install generated packages for testing.
 
-Supports two modes:
+Supports three modes:
 1. Build wheels from source dirs into a wheel directory (build command)
 2. Install from pre-built wheels via --find-links (instant, no compilation)
+3. Link the source dirs into a merged tree on sys.path (link command, no build)
 
 The build step runs once before tox envs start. Each tox env then installs
 from pre-built wheels, avoiding redundant source builds across environments.
+Wheels are built in parallel, and a package is only rebuilt when its content
+hash differs from the one recorded for its wheel in .wheels/<flavor>/manifest.json.
 """
 
 import glob
+import hashlib
+import json
 import os
+import shutil
 import subprocess
 import sys
+import sysconfig
+from concurrent.futures import ThreadPoolExecutor
+from importlib import metadata
+
+# Build outputs and caches inside a package that don't change the wheel it builds.
+HASH_IGNORED_DIRS = {"build", "dist", "__pycache__", ".pytest_cache", ".mypy_cache", "_build", "docs"}
+
+# Top-level folders of a generated package its wheel doesn't install, matching the
+# `[tool.setuptools.packages.find]` excludes of the generated pyproject.toml.
+LINK_EXCLUDED_PREFIXES = ("tests", "generated_tests", "samples", "generated_samples", "doc")
 
 
 def _find_packages(generated_dir):
@@ -27,10 +43,61 @@ def _find_packages(generated_dir):
     ])
 
 
-def build_wheels(flavor, tests_dir):
-    """Build wheels for all packages into a shared directory."""
+def _hash_package(pkg):
+    """Hash the relative paths and contents of every source file of a package."""
+    digest = hashlib.sha256()
+    for root, dirnames, filenames in os.walk(pkg):
+        dirnames[:] = sorted(
+            d for d in dirnames
+            if d not in HASH_IGNORED_DIRS and not d.startswith(".") and not d.endswith("egg-info")
+        )
+        for filename in sorted(filenames):
+            path = os.path.join(root, filename)
+            digest.update(os.path.relpath(path, pkg).replace(os.sep, "/").encode() + b"\0")
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _load_manifest(manifest_path):
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _build_wheel(pkg, wheel_dir):
+    """Build one wheel in its own staging dir and return its file name, or None on failure."""
+    staging_dir = os.path.join(wheel_dir, ".staging", os.path.basename(pkg))
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    try:
+        subprocess.run(
+            ["uv", "build", "--wheel", "--no-build-logs", "--out-dir", staging_dir, pkg],
+            check=True,
+            capture_output=True,
+        )
+        wheels = glob.glob(os.path.join(staging_dir, "*.whl"))
+        if len(wheels) != 1:
+            return None
+        wheel_name = os.path.basename(wheels[0])
+        os.replace(wheels[0], os.path.join(wheel_dir, wheel_name))
+        return wheel_name
+    except subprocess.CalledProcessError:
+        return None
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def build_wheels(flavor, tests_dir, jobs=None):
+    """Build wheels for all packages into a shared directory.
+
+    Packages whose content hash matches the manifest entry of an existing wheel are
+    skipped, and wheels of changed, failed or removed packages are pruned.
+    """
     generated_dir = os.path.join(tests_dir, "generated", flavor)
     wheel_dir = os.path.join(tests_dir, ".wheels", flavor)
+    manifest_path = os.path.join(wheel_dir, "manifest.json")
     os.makedirs(wheel_dir, exist_ok=True)
 
     packages = _find_packages(generated_dir)
@@ -38,32 +105,185 @@ def build_wheels(flavor, tests_dir):
         print(f"Warning: No packages found in {generated_dir}")
         return
 
-    print(f"Building {len(packages)} wheels for {flavor}...")
+    old_manifest = _load_manifest(manifest_path)
+    manifest = {}
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        hashes = dict(zip(packages, executor.map(_hash_package, packages)))
+    to_build = []
+    for pkg in packages:
+        entry = old_manifest.get(os.path.basename(pkg))
+        if (
+            entry
+            and entry["hash"] == hashes[pkg]
+            and os.path.exists(os.path.join(wheel_dir, entry["wheel"]))
+        ):
+            manifest[os.path.basename(pkg)] = entry
+        else:
+            to_build.append(pkg)
 
+    print(f"Building {len(to_build)} wheels for {flavor} ({len(manifest)} up to date)...")
+
+    # Each build is a uv subprocess, so threads are enough to keep every core busy.
     failed = []
-    for pkg in packages:
-        try:
-            subprocess.run(
-                ["uv", "build", "--wheel", "--no-build-logs", "--out-dir", wheel_dir, pkg],
-                check=True,
-                capture_output=True,
-            )
-        except subprocess.CalledProcessError:
-            pkg_name = os.path.basename(pkg)
-            print(f"Warning: Failed to build wheel for {pkg_name}, will install from source")
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as executor:
+        built = dict(zip(to_build, executor.map(lambda pkg: _build_wheel(pkg, wheel_dir), to_build)))
+    shutil.rmtree(os.path.join(wheel_dir, ".staging"), ignore_errors=True)
+    for pkg, wheel_name in built.items():
+        if wheel_name:
+            manifest[os.path.basename(pkg)] = {"hash": hashes[pkg], "wheel": wheel_name}
+        else:
+            print(f"Warning: Failed to build wheel for {os.path.basename(pkg)}, will install from source")
             failed.append(pkg)
 
-    wheel_count = len(glob.glob(os.path.join(wheel_dir, "*.whl")))
-    print(f"Built {wheel_count}/{len(packages)} wheels for {flavor}")
+    # Prune wheels that no current package maps to: old versions, failed and removed packages.
+    current_wheels = {entry["wheel"] for entry in manifest.values()}
+    for wheel in glob.glob(os.path.join(wheel_dir, "*.whl")):
+        if os.path.basename(wheel) not in current_wheels:
+            os.remove(wheel)
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"Built {len(built) - len(failed)}/{len(to_build)} wheels for {flavor}, "
+          f"{len(manifest)}/{len(packages)} up to date")
     if failed:
         print(f"  Skipped {len(failed)}: {', '.join(os.path.basename(p) for p in failed)}")
 
 
+def _pth_path(flavor):
+    return os.path.join(sysconfig.get_paths()["purelib"], f"_generated_{flavor}_packages.pth")
+
+
+def _link_dir(flavor):
+    return os.path.join(sysconfig.get_paths()["purelib"], f"_generated_{flavor}_packages")
+
+
+def _is_namespace_init(path):
+    """Whether an __init__.py only declares a namespace (pkgutil style, or empty)."""
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    if "extend_path" in content or "declare_namespace" in content:
+        return True
+    return all(not line.strip() or line.lstrip().startswith("#") for line in content.splitlines())
+
+
+def _installed_dirs(pkg):
+    """Top-level folders of a generated package that end up in its wheel."""
+    return [
+        name for name in sorted(os.listdir(pkg))
+        if os.path.isdir(os.path.join(pkg, name))
+        and not name.startswith((".", "_"))
+        and not name.startswith(LINK_EXCLUDED_PREFIXES)
+        and not name.endswith("egg-info")
+        and name not in HASH_IGNORED_DIRS
+    ]
+
+
+def _link(source, target):
+    try:
+        os.symlink(source, target, target_is_directory=os.path.isdir(source))
+    except OSError:
+        # Creating symlinks needs extra privileges on Windows.
+        if os.path.isdir(source):
+            shutil.copytree(source, target, ignore=shutil.ignore_patterns("__pycache__"))
+        else:
+            shutil.copy2(source, target)
+
+
+def _merge(sources, target):
+    """Lay out folders that several packages provide at the same import path into ``target``.
+
+    The result matches installing their wheels side by side: a folder only one package
+    provides is linked as a whole, folders shared by several are merged entry by entry.
+    The generated wheels exclude the namespace ``__init__.py`` of shared parents, so a
+    regular ``__init__.py`` (``typetest/model/notdiscriminated``) wins over the namespace
+    ones of packages nested below it (``.../notdiscriminated/typeddict``), and a folder
+    with only namespace ones becomes an implicit namespace package.
+    """
+    if len(sources) == 1:
+        _link(sources[0], target)
+        return
+    os.mkdir(target)
+    entries = {}
+    for source in sources:
+        for name in sorted(os.listdir(source)):
+            if name != "__pycache__":
+                entries.setdefault(name, []).append(os.path.join(source, name))
+    for name, paths in entries.items():
+        dirs = [path for path in paths if os.path.isdir(path)]
+        if dirs:
+            _merge(dirs, os.path.join(target, name))
+        elif name == "__init__.py":
+            regular = [path for path in paths if not _is_namespace_init(path)]
+            if regular:
+                _link(regular[0], os.path.join(target, name))
+        else:
+            _link(paths[0], os.path.join(target, name))
+
+
+def _uninstall(names):
+    cmd = ["uv", "pip", "uninstall", "--python", sys.executable] + names
+    try:
+        subprocess.run(cmd, check=True)
+    except FileNotFoundError:
+        subprocess.run([sys.executable, "-m", "pip", "uninstall", "-y"] + names, check=True)
+
+
+def link_packages(flavor, tests_dir):
+    """Make generated packages importable in place, without building or installing them.
+
+    Their package folders are merged into one tree of symlinks next to site-packages,
+    laid out like the installed wheels (see ``_merge``), and a .pth file puts that tree
+    on sys.path. Putting every package root on sys.path instead would let a package with
+    a regular ``typetest/model/notdiscriminated/__init__.py`` hide the
+    ``typetest.model.notdiscriminated.typeddict`` package of another root. Wheels installed
+    earlier in this env would shadow the linked sources, so they are uninstalled first.
+    """
+    generated_dir = os.path.join(tests_dir, "generated", flavor)
+    packages = _find_packages(generated_dir) if os.path.exists(generated_dir) else []
+    if not packages:
+        print(f"Warning: No packages found in {generated_dir}")
+        return
+
+    manifest = _load_manifest(os.path.join(tests_dir, ".wheels", flavor, "manifest.json"))
+    installed = []
+    for entry in manifest.values():
+        name = entry["wheel"].split("-")[0]
+        try:
+            metadata.distribution(name)
+            installed.append(name)
+        except metadata.PackageNotFoundError:
+            pass
+    if installed:
+        print(f"  Uninstalling {len(installed)} wheel-installed packages shadowing the linked sources")
+        _uninstall(installed)
+
+    link_dir = _link_dir(flavor)
+    shutil.rmtree(link_dir, ignore_errors=True)
+    os.makedirs(link_dir)
+    top_level = {}
+    for pkg in packages:
+        for name in _installed_dirs(pkg):
+            top_level.setdefault(name, []).append(os.path.abspath(os.path.join(pkg, name)))
+    for name, sources in sorted(top_level.items()):
+        _merge(sources, os.path.join(link_dir, name))
+
+    pth_path = _pth_path(flavor)
+    with open(pth_path, "w") as f:
+        f.write(link_dir + "\n")
+    print(f"Linked {len(packages)} packages from {generated_dir} into {link_dir}")
+
+
 def install_packages(flavor, tests_dir):
     """Install generated packages for the given flavor."""
     generated_dir = os.path.join(tests_dir, "generated", flavor)
     wheel_dir = os.path.join(tests_dir, ".wheels", flavor)
 
+    # Installed packages replace linked sources rather than sit next to them.
+    if os.path.exists(_pth_path(flavor)):
+        os.remove(_pth_path(flavor))
+    shutil.rmtree(_link_dir(flavor), ignore_errors=True)
+
     if not os.path.exists(generated_dir):
         print(f"Warning: Generated directory does not exist: {generated_dir}")
         return
@@ -123,15 +343,19 @@ def main():
     if len(sys.argv) < 2:
         print("Usage: install_packages.py <flavor> [tests_dir]")
         print("       install_packages.py build <flavor> [tests_dir]")
+        print("       install_packages.py link <flavor> [tests_dir]")
         sys.exit(1)
 
-    if sys.argv[1] == "build":
+    if sys.argv[1] in ("build", "link"):
         if len(sys.argv) < 3:
-            print("Usage: install_packages.py build <flavor> [tests_dir]")
+            print(f"Usage: install_packages.py {sys.argv[1]} <flavor> [tests_dir]")
             sys.exit(1)
         flavor = sys.argv[2]
         tests_dir = sys.argv[3] if len(sys.argv) > 3 else os.path.dirname(os.path.abspath(__file__))
-        build_wheels(flavor, tests_dir)
+        if sys.argv[1] == "build":
+            build_wheels(flavor, tests_dir)
+        else:
+            link_packages(flavor, tests_dir)
     elif sys.argv[1] in ("azure", "unbranded"):
         flavor = sys.argv[1]
         tests_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.dirname(os.path.abspath(__file__))
@@ -0,0 +1,23 @@
+// Preloaded (NODE_OPTIONS=--require) into `tsp-spector serve` by tests/conftest.py.
+// Once a server starts listening, reports its port to the address in MOCK_SERVER_READY_ADDRESS,
+// so the test session is notified of readiness instead of polling the mock server.
+const net = require("net");
+
+const readyAddress = process.env.MOCK_SERVER_READY_ADDRESS;
+
+if (readyAddress) {
+  const [host, port] = readyAddress.split(":");
+  const listen = net.Server.prototype.listen;
+  net.Server.prototype.listen = function (...args) {
+    this.once("listening", () => {
+      const address = this.address();
+      if (typeof address !== "object" || address === null) {
+        return;
+      }
+      const socket = net.connect(Number(port), host, () => socket.end(`${address.port}\n`));
+      // The test session may already be gone; readiness reporting is best effort.
+      socket.on("error", () => {});
+    });
+    return listen.apply(this, args);
+  };
+}